@@ -0,0 +1,316 @@
+"""
+Full FastAPI application behind ``api/index.py``.
+
+Not a serverless function of its own (Vercel skips ``_``-prefixed files):
+``api/index.py`` imports it on the first request that needs FastAPI.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+import asyncio
+import logging
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Make the shared scoring engine importable both locally and on Vercel
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matcher
+from matcher import iter_scores, rank_candidates, rank_matrix
+from matcher.cache import MemoryBackend, ScoreCache, SQLiteBackend
+from matcher.coalesce import SingleFlight
+from matcher.envelope import dumps, encode_envelope
+from matcher.metrics import METRICS, SlowRequestProfiler
+from matcher.scoring import DEFAULT_PIPELINE
+from matcher.semantic import SEMANTIC_PIPELINE
+from matcher.validation import (LIMITS, RequestRejected, check_length, check_size, load_body, pair_count,
+                                record_rejection, schema, validate_encoded)
+from matcher.workers import PoolBusy, ScoringPool
+
+logger = logging.getLogger(__name__)
+
+# Whoever imports this module is about to score, so build every table now
+# rather than inside the first request.
+matcher.preload()
+
+app = FastAPI(title="Dating Matcher API")
+
+# Pairwise score cache; set MATCHER_CACHE_PATH to share it between workers.
+# It holds structured results: the explanation and recommendations are
+# rendered per request, and only for requests that include them
+_cache_size = int(os.environ.get('MATCHER_CACHE_SIZE', '10000'))
+_cache_ttl = float(os.environ['MATCHER_CACHE_TTL']) if os.environ.get('MATCHER_CACHE_TTL') else None
+_cache_compute = DEFAULT_PIPELINE.with_options(score_only=True).score
+if os.environ.get('MATCHER_CACHE_PATH'):
+    score_cache = ScoreCache(SQLiteBackend(os.environ['MATCHER_CACHE_PATH'], maxsize=_cache_size, ttl=_cache_ttl),
+                             _cache_compute)
+else:
+    score_cache = ScoreCache(MemoryBackend(maxsize=_cache_size, ttl=_cache_ttl), _cache_compute)
+
+# Ranking a candidate pool is CPU-bound: run it off the event loop so one large
+# batch does not stall the other connections of a worker. The self-hosted
+# server uses processes (forked after preload, so they inherit the tables);
+# threads still share the GIL with the event loop
+scoring_pool = ScoringPool.from_env()
+
+# Batches of at most this many pairs rank inline, as /api/submit does: a
+# 200-candidate pool scores in well under a millisecond, about what the hop
+# to the pool and back costs it
+_inline_pairs = int(os.environ.get('MATCHER_INLINE_PAIRS', '5000'))
+
+# Retries and fan-out deliver byte-identical batch payloads concurrently:
+# rank each once and answer every copy from the same result
+batch_flight = SingleFlight()
+
+# Compile the payload validators now rather than inside the first request
+schema('matching')
+schema('batch')
+
+# Opt-in: MATCHER_PROFILE_SLOW_MS=<ms> profiles a sample of requests and
+# logs the hottest functions of any that exceed the threshold
+slow_profiler = SlowRequestProfiler.from_env(METRICS)
+
+_DECODE_STAGE = METRICS.summary('stage_seconds', stage='decode')
+_ENCODE_STAGE = METRICS.summary('stage_seconds', stage='encode')
+
+METRICS.gauge('score_cache_hits', lambda: score_cache.hits, 'Pairwise score cache hits')
+METRICS.gauge('score_cache_misses', lambda: score_cache.misses, 'Pairwise score cache misses')
+METRICS.gauge('scoring_pool_pending', lambda: scoring_pool.pending, 'Scoring jobs queued or running')
+METRICS.gauge('scoring_pool_rejected', lambda: scoring_pool.rejected, 'Scoring jobs refused because the pool was full')
+METRICS.gauge('batch_coalesced', lambda: batch_flight.coalesced, 'Batch requests answered by an identical one in flight')
+METRICS.gauge('batch_coalesce_rate', lambda: batch_flight.rate, 'Fraction of batch requests that were coalesced')
+
+
+@app.on_event("shutdown")
+def stop_scoring_pool():
+    # The server has already drained in-flight requests
+    scoring_pool.shutdown(wait=True)
+
+
+def envelope_response(body: dict, response_payload: dict, schema_digest: str) -> Response:
+    """Return an already-serialized response envelope without re-encoding it"""
+    with _ENCODE_STAGE.time():
+        content = encode_envelope(body, response_payload, schema_digest)
+    return Response(content=content, media_type="application/json")
+
+
+def busy_response(route: str, e: PoolBusy) -> JSONResponse:
+    METRICS.inc('busy_total', route=route)
+    return JSONResponse(content={"error": "busy", "reason": str(e)}, status_code=503,
+                        headers={"Retry-After": "1"})
+
+
+def rejected_response(route: str, e: RequestRejected) -> JSONResponse:
+    record_rejection(route, e)
+    return JSONResponse(content={"error": e.reason, "reason": str(e)}, status_code=e.status_code)
+
+
+async def read_body(request: Request, limit: int) -> bytes:
+    """The request body, refused with ``PayloadTooLarge`` past ``limit`` bytes without reading the rest"""
+    check_length(request.headers.get('content-length'), limit)
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        check_size(size, limit)
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def error_response(route: str, e: Exception) -> JSONResponse:
+    logger.exception("Error processing %s request", route)
+    METRICS.inc('errors_total', route=route)
+    return JSONResponse(content={"error": str(e)}, status_code=500)
+
+
+def batch_job(payload_data: Dict) -> Optional[List[Dict]]:
+    """
+    Rank one validated ``/api/batch`` payload on the scoring pool.
+
+    Timings of a process pool job are recorded in that process, not in this
+    one's metrics.
+    """
+    with slow_profiler.profile('batch'):
+        candidates = payload_data.get('candidates')
+        top_k = payload_data.get('top_k')
+        semantic = bool(payload_data.get('semantic'))
+        if isinstance(candidates, list):
+            if 'seeker' in payload_data:
+                return rank_candidates(payload_data['seeker'], candidates, top_k,
+                                       payload_data.get('max_distance_km'), semantic)
+            elif 'seekers' in payload_data:
+                return rank_matrix(payload_data['seekers'], candidates, top_k, semantic)
+        return None
+
+
+async def validated_batch(payload: str) -> Optional[List[Dict]]:
+    """
+    Validate an encoded ``/api/batch`` payload, then rank it (on the pool
+    unless it is small).
+
+    Runs once per group of coalesced requests. Validation happens before
+    anything is queued, so an invalid payload never takes a pool slot.
+    Payloads no larger than an ``/api/submit`` body are validated inline, as
+    that route does; larger ones on a helper thread, as they take a while.
+    """
+    with _DECODE_STAGE.time():
+        if len(payload) <= LIMITS.max_body_bytes:
+            payload_data = validate_encoded('batch', payload)
+        else:
+            payload_data = await asyncio.get_running_loop().run_in_executor(None, validate_encoded, 'batch', payload)
+    if pair_count(payload_data) <= _inline_pairs and not payload_data.get('semantic'):
+        return batch_job(payload_data)
+    return await scoring_pool.submit(batch_job, payload_data)
+
+
+@app.post("/api/submit")
+@app.post("/submit")
+async def handle_agent_message(request: Request):
+    """
+    Handle incoming uAgent messages
+    """
+    try:
+        raw = await read_body(request, LIMITS.max_body_bytes)
+        with slow_profiler.profile('submit'):
+            with _DECODE_STAGE.time():
+                body = load_body(raw)
+                payload = body.get('payload') if isinstance(body, dict) else None
+                payload_data = validate_encoded('matching', payload) if isinstance(payload, str) else None
+            
+            # Extract payload from uAgent envelope
+            if payload_data is not None:
+                # Process the matching request
+                if 'profile1' in payload_data and 'profile2' in payload_data:
+                    profile1 = payload_data['profile1']
+                    profile2 = payload_data['profile2']
+                    
+                    include = () if payload_data.get('score_only') else payload_data.get('include')
+                    if 'min_score' in payload_data or payload_data.get('semantic'):
+                        # Cut-off and semantic results are not cached, so they never stand in for a full one
+                        base = SEMANTIC_PIPELINE if payload_data.get('semantic') else DEFAULT_PIPELINE
+                        pipeline = base.with_options(min_score=payload_data.get('min_score'), include=include)
+                        response_payload = pipeline.score(profile1, profile2)
+                        if response_payload is None:
+                            response_payload = {"score": None, "min_score": pipeline.min_score}
+                    else:
+                        response_payload = DEFAULT_PIPELINE.render(profile1, profile2,
+                                                                   score_cache.get_or_compute(profile1, profile2),
+                                                                   include)
+                    
+                    return envelope_response(body, response_payload, "matching_response_schema")
+        
+        return JSONResponse(content={"status": "received"}, status_code=200)
+        
+    except RequestRejected as e:
+        return rejected_response('submit', e)
+    except Exception as e:
+        return error_response('submit', e)
+
+@app.post("/api/batch")
+@app.post("/batch")
+async def handle_batch_message(request: Request):
+    """
+    Rank candidates for one seeker (``seeker``) or for many (``seekers``)
+    """
+    try:
+        raw = await read_body(request, LIMITS.max_batch_bytes)
+        body = load_body(raw)
+        payload = body.get('payload') if isinstance(body, dict) else None
+
+        if isinstance(payload, str):
+            # Keyed on the payload itself: str hashes are computed in C and cached
+            matches = await batch_flight.run(payload, validated_batch, payload)
+            if matches is not None:
+                # Addressed per request: coalesced callers differ in sender, session and nonce
+                return envelope_response(body, {"matches": matches}, "batch_matching_response_schema")
+
+        return JSONResponse(content={"status": "received"}, status_code=200)
+
+    except PoolBusy as e:
+        return busy_response('batch', e)
+    except RequestRejected as e:
+        return rejected_response('batch', e)
+    except Exception as e:
+        return error_response('batch', e)
+
+@app.post("/api/batch/stream")
+@app.post("/batch/stream")
+async def handle_batch_stream(request: Request):
+    """
+    Score a seeker against a candidate pool, streaming one NDJSON match per line
+    """
+    try:
+        raw = await read_body(request, LIMITS.max_batch_bytes)
+        with _DECODE_STAGE.time():
+            body = load_body(raw)
+            payload = body.get('payload') if isinstance(body, dict) else None
+            payload_data = validate_encoded('batch', payload) if isinstance(payload, str) else None
+
+        if payload_data is not None:
+            candidates = payload_data.get('candidates')
+            if 'seeker' in payload_data and isinstance(candidates, list):
+                matches = iter_scores(
+                    payload_data['seeker'],
+                    candidates,
+                    chunk_size=payload_data.get('chunk_size', 1024),
+                    min_score=payload_data.get('min_score'),
+                    semantic=bool(payload_data.get('semantic')),
+                )
+                lines = (dumps(match) + b"\n" for match in matches)
+                return StreamingResponse(lines, media_type="application/x-ndjson")
+
+        return JSONResponse(content={"status": "received"}, status_code=200)
+
+    except RequestRejected as e:
+        return rejected_response('batch_stream', e)
+    except Exception as e:
+        return error_response('batch_stream', e)
+
+# Precomputed daily matches written by ``python -m matcher.materialize``
+_match_file = None
+
+
+def match_file():
+    """The file at MATCHER_MATCHES_PATH, reopened when a newer one replaces it"""
+    global _match_file
+    path = os.environ.get('MATCHER_MATCHES_PATH')
+    if not path:
+        return None
+    if _match_file is None or _match_file.path != path or _match_file.stale():
+        from matcher.materialize import MatchFile
+        previous, _match_file = _match_file, MatchFile(path)
+        if previous is not None:
+            # Lookups are synchronous, so no request is still reading it
+            previous.close()
+    return _match_file
+
+
+@app.get("/api/matches/{user_id}")
+@app.get("/matches/{user_id}")
+async def precomputed_matches(user_id: str):
+    """
+    Serve a user's precomputed top matches from the memory-mapped match file
+    """
+    try:
+        matches_file = match_file()
+        if matches_file is None:
+            return JSONResponse(content={"error": "no precomputed matches configured"}, status_code=404)
+        matches = matches_file.matches(user_id)
+        if matches is None:
+            return JSONResponse(content={"error": f"no precomputed matches for {user_id}"}, status_code=404)
+        return Response(content=dumps({"id": user_id, "generated_at": matches_file.created, "matches": matches}),
+                        media_type="application/json")
+    except Exception as e:
+        return error_response('matches', e)
+
+@app.get("/api/metrics")
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/")
+@app.get("/api")
+async def health_check():
+    """Health check endpoint"""
+    return {"status": "Dating Matcher Agent is running", "agent": "lovefi-matcher"}
+
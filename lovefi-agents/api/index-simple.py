@@ -1,5 +1,10 @@
 from http.server import BaseHTTPRequestHandler
 import json
+import os
+import sys
+
+# Make the shared scoring engine importable both locally and on Vercel
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -23,14 +28,20 @@ class handler(BaseHTTPRequestHandler):
 
     def do_POST(self):
         try:
-            content_length = int(self.headers.get('Content-Length', 0))
+            # Only the limits are loaded here; pydantic waits for a body worth validating
+            from matcher.validation import LIMITS, RequestRejected, check_length, record_rejection
+
+            try:
+                # Refuse a malformed or oversized declared length, without reading the body
+                content_length = check_length(self.headers.get('Content-Length'), LIMITS.max_body_bytes)
+            except RequestRejected as e:
+                record_rejection('simple', e)
+                self.close_connection = True
+                self.send_json(e.status_code, {"error": e.reason, "reason": str(e), "agent": "lovefi-matcher"})
+                return
+
             post_data = self.rfile.read(content_length) if content_length > 0 else b''
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
             # Parse request data
             request_data = {}
             if post_data:
@@ -40,9 +51,18 @@ class handler(BaseHTTPRequestHandler):
                     request_data = {"raw_data": post_data.decode('utf-8', errors='ignore')}
             
             # Simple compatibility analysis
-            if 'profile1' in request_data and 'profile2' in request_data:
-                profile1 = request_data['profile1']
-                profile2 = request_data['profile2']
+            if isinstance(request_data, dict) and 'profile1' in request_data and 'profile2' in request_data:
+                from matcher.validation import validate
+
+                try:
+                    checked = validate('matching', request_data)
+                except RequestRejected as e:
+                    record_rejection('simple', e)
+                    self.send_json(e.status_code, {"error": e.reason, "reason": str(e), "agent": "lovefi-matcher"})
+                    return
+
+                profile1 = checked['profile1']
+                profile2 = checked['profile2']
                 
                 # Basic compatibility calculation
                 score = self.calculate_compatibility(profile1, profile2)
@@ -60,17 +80,13 @@ class handler(BaseHTTPRequestHandler):
                     "message": "POST request processed successfully",
                     "agent": "lovefi-matcher",
                     "note": "Send profile1 and profile2 for compatibility analysis",
-                    "received_keys": list(request_data.keys())
+                    "received_keys": list(request_data.keys()) if isinstance(request_data, dict) else []
                 }
             
-            self.wfile.write(json.dumps(response, indent=2).encode('utf-8'))
+            self.send_json(200, response, indent=2)
             return
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
             error_response = {
                 "error": "Internal server error",
                 "message": str(e),
@@ -78,37 +94,21 @@ class handler(BaseHTTPRequestHandler):
                 "agent": "lovefi-matcher"
             }
             
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+            self.send_json(500, error_response)
             return
 
+    def send_json(self, status, body, indent=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps(body, indent=indent).encode('utf-8'))
+
     def calculate_compatibility(self, profile1, profile2):
         """Simple compatibility calculation"""
-        score = 50  # Base score
-        
-        # Age compatibility
-        age1 = profile1.get('age', 25)
-        age2 = profile2.get('age', 25)
-        age_diff = abs(age1 - age2)
-        if age_diff <= 5:
-            score += 20
-        elif age_diff <= 10:
-            score += 10
-        
-        # Interest overlap
-        interests1 = set(profile1.get('interests', []))
-        interests2 = set(profile2.get('interests', []))
-        common_interests = len(interests1 & interests2)
-        score += min(common_interests * 5, 25)
-        
-        # Location compatibility
-        loc1 = profile1.get('location', '').lower()
-        loc2 = profile2.get('location', '').lower()
-        if loc1 == loc2:
-            score += 15
-        elif any(city in loc1 and city in loc2 for city in ['new york', 'los angeles', 'chicago']):
-            score += 10
-        
-        return max(0, min(100, score))
+        # Imported here so GET requests never load the scoring engine
+        from matcher import quick_score
+        return quick_score(profile1, profile2)
 
     def do_OPTIONS(self):
         self.send_response(200)
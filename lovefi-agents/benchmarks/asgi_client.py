@@ -0,0 +1,77 @@
+"""
+Minimal in-process ASGI client for benchmarks.
+
+Calls the application coroutine directly on one event loop, so timings
+include routing, middleware and serialization but no sockets or HTTP
+parsing, and need no test-client dependency.
+"""
+import asyncio
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ASGIClient:
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+
+    def close(self):
+        self.loop.close()
+
+    def request(self, method: str, path: str, body: bytes = b"") -> Tuple[int, bytes]:
+        return self.loop.run_until_complete(self._request(method, path, body))
+
+    def concurrent(self, method: str, path: str, bodies: List[bytes]) -> List[Tuple[int, bytes]]:
+        """Send every body at once and wait for all the responses"""
+        async def run():
+            return await asyncio.gather(*(self._request(method, path, body) for body in bodies))
+        return self.loop.run_until_complete(run())
+
+    async def _request(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        messages: List[Dict[str, Any]] = []
+        received = False
+
+        async def receive():
+            nonlocal received
+            if received:
+                # The request is over; wait like a server whose client is still connected
+                await asyncio.Event().wait()
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "root_path": "", "query_string": b"",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        }
+        await self.app(scope, receive, send)
+        status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+        content = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+        return status, content
+
+
+def envelope(payload: Dict, sender: str = "agent1qbenchmark", session: str = "benchmark", nonce: int = 0) -> bytes:
+    """Wrap ``payload`` in a uAgent envelope as the TypeScript client does"""
+    return json.dumps({
+        "version": 1,
+        "sender": sender,
+        "target": "agent1qlovefi",
+        "session": session,
+        "schema_digest": "model:benchmark",
+        "payload": base64.b64encode(json.dumps(payload).encode()).decode(),
+        "expires": 0,
+        "nonce": nonce,
+    }).encode()
+
+
+def open_envelope(content: bytes) -> Optional[Dict]:
+    body = json.loads(content)
+    if "payload" not in body:
+        return None
+    return json.loads(base64.b64decode(body["payload"]))
@@ -0,0 +1,57 @@
+"""
+Parity check and benchmark for one-to-many batch scoring.
+
+Checks ``score_matrix`` against ``score_profiles`` pair by pair, then times
+ranking one seeker against pools of increasing size both ways.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_batch --pool 1000 10000 100000
+"""
+import argparse
+import math
+import time
+
+from matcher import score_profiles
+from matcher.batch import np, rank_candidates, score_matrix
+
+from .corpus import make_profiles
+
+
+def check_parity(count: int):
+    seekers = make_profiles(count // 4, seed=1)
+    candidates = make_profiles(count, seed=2)
+    matrix = score_matrix(seekers, candidates)
+    for i, seeker in enumerate(seekers):
+        for j, candidate in enumerate(candidates):
+            expected = score_profiles(seeker, candidate)['score']
+            assert math.isclose(matrix[i][j], expected, abs_tol=1e-9), (seeker, candidate, matrix[i][j], expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pool', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    check_parity(200)
+    print(f"parity ok (backend: {'numpy' if np is not None else 'pure python'})")
+
+    seeker = make_profiles(1, seed=3)[0]
+    for size in args.pool:
+        pool = make_profiles(size, seed=4)
+
+        start = time.perf_counter()
+        looped = sorted((score_profiles(seeker, c)['score'] for c in pool), reverse=True)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ranked = rank_candidates(seeker, pool)
+        batch_time = time.perf_counter() - start
+
+        assert [m['score'] for m in ranked[:10]] == looped[:10]
+        print(f"pool={size:>7}  per-pair loop={loop_time * 1e3:9.1f}ms  "
+              f"batch={batch_time * 1e3:8.1f}ms  speedup={loop_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Cost of concurrent identical ``/api/batch`` requests with single-flight coalescing.
+
+Sends ``--copies`` simultaneous requests carrying the same payload (each
+with its own sender, session and nonce, like client retries and fan-out)
+and the same number carrying distinct payloads, through the ASGI app in
+process. Checks that every response is addressed to its own request and
+that coalesced copies return the same matches.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_coalesce --copies 1 4 16 --pool 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from .asgi_client import ASGIClient, envelope, open_envelope
+from .corpus import make_profiles
+from .suite import load_entry_point
+
+
+def run(client: ASGIClient, bodies, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        responses = client.concurrent("POST", "/api/batch", bodies)
+    elapsed = (time.perf_counter() - start) / rounds
+
+    for body, (status, content) in zip(bodies, responses):
+        request = json.loads(body)
+        response = json.loads(content)
+        assert status == 200
+        assert (response['target'], response['session'], response['nonce']) == \
+            (request['sender'], request['session'], request['nonce'])
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--copies', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--pool', type=int, default=2000, help='candidates per request')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    # Enough workers and queue that distinct payloads are not turned away
+    os.environ.setdefault('MATCHER_QUEUE_DEPTH', str(max(args.copies) * 2))
+    module = load_entry_point('index.py')
+    client = ASGIClient(module.app)
+    module.app.app.load()
+    flight = sys.modules['_app'].batch_flight
+
+    profiles = make_profiles(args.pool + max(args.copies), seed=11)
+    pool = profiles[max(args.copies):]
+
+    def body(seeker, n):
+        return envelope({"seeker": seeker, "candidates": pool, "top_k": 10},
+                        sender=f"agent1qclient{n}", session=f"session-{n}", nonce=n)
+
+    print(f"pool={args.pool}  (ms per round of concurrent requests)")
+    for copies in args.copies:
+        identical = [body(profiles[0], n) for n in range(copies)]
+        distinct = [body(profiles[n], n) for n in range(copies)]
+
+        before = flight.coalesced
+        shared = run(client, identical, args.rounds)
+        coalesced = (flight.coalesced - before) / args.rounds
+        separate = run(client, distinct, args.rounds)
+
+        matches = {json.dumps(open_envelope(content)['matches'])
+                   for _, content in client.concurrent("POST", "/api/batch", identical)}
+        assert len(matches) == 1
+        print(f"copies={copies:<3}  identical {shared * 1e3:7.1f}ms ({coalesced:.0f} coalesced)  "
+              f"distinct {separate * 1e3:7.1f}ms  ({separate / shared:.1f}x)")
+    print(f"coalesce rate over the run: {flight.rate:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold-start cost of each serverless entry point under ``api/``.
+
+Every run starts a fresh interpreter, imports the entry point by path and
+serves its first GET and, where it scores, its first POST: what a new
+Vercel instance pays before answering. Requests are driven in-process
+(ASGI calls, ``BaseHTTPRequestHandler`` over in-memory files, or a direct
+``handler(event, context)`` call), so no server or network is involved.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_coldstart --runs 5
+    MATCHER_EAGER_IMPORTS=1 python -m benchmarks.bench_coldstart   # previous eager behaviour
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api')
+
+ENTRY_POINTS = ['index.py', 'index-simple.py', 'simple.py', 'health.py', 'minimal.py', 'test.py']
+
+# Runs in the fresh interpreter: argv[1] is the entry point path
+CHILD = r'''
+import asyncio, base64, importlib.util, io, json, sys, time
+
+PROFILES = {
+    "profile1": {"age": 28, "interests": ["hiking", "cooking"], "location": "New York"},
+    "profile2": {"age": 30, "interests": ["hiking", "yoga"], "location": "Brooklyn, NY"},
+}
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1e3
+
+def asgi(app, method, path, body=b""):
+    async def run():
+        sent = []
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+        async def send(message):
+            sent.append(message)
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+                 "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+                 "query_string": b"", "headers": [(b"content-type", b"application/json")],
+                 "client": ("127.0.0.1", 1), "server": ("localhost", 80)}
+        await app(scope, receive, send)
+        assert sent[0]["status"] == 200, sent[0]
+    asyncio.run(run())
+
+def http_handler(cls, method, body=b""):
+    raw = f"{method} / HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    h = cls.__new__(cls)
+    h.rfile, h.wfile = io.BytesIO(raw), io.BytesIO()
+    h.client_address, h.server, h.request = ("127.0.0.1", 1), None, None
+    h.log_message = lambda *args: None
+    h.handle_one_request()
+    assert b" 200 " in h.wfile.getvalue().split(b"\r\n", 1)[0]
+
+path = sys.argv[1]
+result = {}
+spec = importlib.util.spec_from_file_location("entry", path)
+module = importlib.util.module_from_spec(spec)
+result["import_ms"] = timed(lambda: spec.loader.exec_module(module))
+
+app = getattr(module, "app", None)
+handler = getattr(module, "handler", None)
+if app is not None:
+    envelope = json.dumps({"sender": "agent1qbench", "payload": base64.b64encode(json.dumps(PROFILES).encode()).decode()}).encode()
+    result["get_ms"] = timed(lambda: asgi(app, "GET", "/api"))
+    result["post_ms"] = timed(lambda: asgi(app, "POST", "/api/submit", envelope))
+elif isinstance(handler, type):
+    result["get_ms"] = timed(lambda: http_handler(handler, "GET"))
+    result["post_ms"] = timed(lambda: http_handler(handler, "POST", json.dumps(PROFILES).encode()))
+else:
+    result["get_ms"] = timed(lambda: handler({}, None))
+print(json.dumps(result))
+'''
+
+
+def measure(entry: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, '-c', CHILD, os.path.join(API_DIR, entry)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--entries', nargs='+', default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    mode = 'eager' if os.environ.get('MATCHER_EAGER_IMPORTS') else 'lazy'
+    print(f"mode={mode}  runs={args.runs}  (medians, ms)")
+    for entry in args.entries:
+        runs = [measure(entry) for _ in range(args.runs)]
+
+        def median(key):
+            values = [run[key] for run in runs if key in run]
+            return f"{statistics.median(values):8.1f}" if values else f"{'-':>8}"
+
+        print(f"{entry:<16}  import={median('import_ms')}  first GET={median('get_ms')}  "
+              f"first POST={median('post_ms')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Envelope encode/decode throughput, old request path vs the current one.
+
+The old path parsed the request with ``request.json()``, base64-decoded the
+payload to a string and parsed it again, then on the way out dumped the
+payload to a string, base64-encoded it and let ``JSONResponse`` serialize
+the whole envelope a second time. ``/api/submit`` now parses the envelope
+with ``validation.load_body`` and decodes and validates the payload in one
+pass with ``validate_encoded``; the response goes through
+``envelope.encode_envelope``. The current decode also validates, so it
+is not expected to beat the old one by much; interest counts stay within
+``MATCHER_MAX_INTERESTS`` (64 by default) for the same reason.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_envelope --interests 10 32 64
+"""
+import argparse
+import base64
+import json
+import time
+
+from matcher import score_profiles
+from matcher.envelope import JSON_BACKEND, encode_envelope
+from matcher.validation import load_body, schema, validate_encoded
+
+from .corpus import make_profiles
+
+
+def legacy_decode(raw: bytes):
+    body = json.loads(raw)
+    payload_str = base64.b64decode(body['payload']).decode('utf-8')
+    return body, json.loads(payload_str)
+
+
+def decode_request(raw: bytes):
+    # What /api/submit does with a request body
+    body = load_body(raw)
+    return body, validate_encoded('matching', body['payload'])
+
+
+def legacy_encode(body, response_payload, schema_digest):
+    envelope = {
+        "version": 1,
+        "sender": "agent1qlovefi...",
+        "target": body.get('sender', ''),
+        "session": body.get('session', ''),
+        "schema_digest": schema_digest,
+        "protocol_digest": None,
+        "payload": base64.b64encode(json.dumps(response_payload).encode()).decode(),
+        "expires": body.get('expires', 0),
+        "nonce": body.get('nonce', 0),
+        "signature": None
+    }
+    # What JSONResponse.render does
+    return json.dumps(envelope, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def throughput(fn, args, seconds: float) -> float:
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn(*args)
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--interests', type=int, nargs='+', default=[10, 32, 64])
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"json backend: {JSON_BACKEND}")
+    schema('matching')
+    for count in args.interests:
+        vocabulary = [f'interest {i}' for i in range(count * 2)]
+        profile1, profile2 = make_profiles(2, min_interests=count, max_interests=count, vocabulary=vocabulary)
+        payload = json.dumps({'profile1': profile1, 'profile2': profile2}).encode()
+        body = {'sender': 'agent1qclient', 'session': 'abc', 'nonce': 7, 'expires': 0,
+                'payload': base64.b64encode(payload).decode()}
+        raw = json.dumps(body).encode()
+        response_payload = score_profiles(profile1, profile2)
+
+        assert legacy_decode(raw) == decode_request(raw)
+        assert legacy_decode(legacy_encode(body, response_payload, 's'))[1] == \
+            legacy_decode(encode_envelope(body, response_payload, 's'))[1]
+
+        rows = []
+        for name, legacy, fast, fn_args in (
+            ('decode', legacy_decode, decode_request, (raw,)),
+            ('encode', legacy_encode, encode_envelope, (body, response_payload, 's')),
+        ):
+            before = throughput(legacy, fn_args, args.seconds)
+            after = throughput(fast, fn_args, args.seconds)
+            rows.append(f"{name} {before:9.0f}/s -> {after:9.0f}/s ({after / before:.1f}x)")
+        print(f"interests={count:>4}  request={len(raw):>6}B  " + "  ".join(rows))
+
+
+if __name__ == "__main__":
+    main()
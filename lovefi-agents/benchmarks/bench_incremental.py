@@ -0,0 +1,80 @@
+"""
+Cost of one profile edit, full re-score vs ``IncrementalScorer.apply_delta``.
+
+Each edited profile has ``--pairs`` tracked pair scores and ``--watchers``
+seekers keep a top-10 list. The full path re-scores every tracked pair of
+the edited profile with ``score_profiles`` and recomputes every top-10 list.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_incremental --pool 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from matcher import score_profiles
+from matcher.incremental import IncrementalScorer
+
+from .corpus import LOCATIONS, interest_vocabulary, make_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pool', type=int, default=100000)
+    parser.add_argument('--pairs', type=int, default=1000)
+    parser.add_argument('--watchers', type=int, default=20)
+    parser.add_argument('--edits', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    profiles = make_profiles(args.pool, seed=5)
+    scorer = IncrementalScorer()
+    for profile in profiles:
+        scorer.add(profile)
+
+    ids = [profile['id'] for profile in profiles]
+    edited = ids[:args.edits]
+    for profile_id in edited:
+        for other in rng.sample(ids, args.pairs):
+            if other != profile_id:
+                scorer.score(profile_id, other)
+    watchers = ids[-args.watchers:]
+    for seeker_id in watchers:
+        scorer.watch(seeker_id)
+
+    vocabulary = interest_vocabulary()
+    for field in ('age', 'interests', 'location'):
+        full, incremental = [], []
+        for profile_id in edited:
+            value = {
+                'age': rng.randint(18, 65),
+                'interests': rng.sample(vocabulary, 4),
+                'location': rng.choice(LOCATIONS),
+            }[field]
+
+            start = time.perf_counter()
+            changed = scorer.apply_delta(profile_id, {field: value}, threshold=1.0)
+            incremental.append((time.perf_counter() - start) * 1e3)
+
+            profile = scorer.profile(profile_id)
+            start = time.perf_counter()
+            for other in scorer._pairs[profile_id]:
+                score_profiles(profile, scorer.profile(other))
+            for seeker_id in watchers:
+                scorer.index.top_k(scorer.profile(seeker_id), 10)
+            full.append((time.perf_counter() - start) * 1e3)
+
+            for seeker_id in watchers:
+                assert scorer.top_k(seeker_id) == scorer.index.top_k(scorer.profile(seeker_id), 10)
+            for change in changed:
+                assert abs(change['new'] - score_profiles(profile, scorer.profile(change['pair'][1]))['score']) < 1e-9
+
+        print(f"edit {field:<9}  full re-score p50={statistics.median(full):8.2f}ms  "
+              f"apply_delta p50={statistics.median(incremental):7.2f}ms  "
+              f"speedup={statistics.median(full) / statistics.median(incremental):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
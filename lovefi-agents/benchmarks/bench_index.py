@@ -0,0 +1,83 @@
+"""
+Top-K query latency for ``CandidateIndex`` against brute-force ranking.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_index --sizes 10000 100000 1000000 --k 10
+"""
+import argparse
+import statistics
+import time
+
+from matcher import rank_candidates
+from matcher.index import CandidateIndex
+
+from .corpus import make_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--radius', type=float, default=100.0,
+                        help='also time top-K queries restricted to this many km')
+    parser.add_argument('--brute-force-limit', type=int, default=1000000,
+                        help='skip the brute-force comparison above this pool size')
+    args = parser.parse_args()
+
+    seekers = make_profiles(args.queries, seed=99)
+    for seeker in seekers:
+        del seeker['id']
+
+    for size in args.sizes:
+        pool = make_profiles(size, seed=5)
+
+        start = time.perf_counter()
+        index = CandidateIndex()
+        for profile in pool:
+            index.add(profile)
+        build = time.perf_counter() - start
+
+        latencies, results = [], []
+        for seeker in seekers:
+            start = time.perf_counter()
+            matches = index.top_k(seeker, args.k)
+            latencies.append((time.perf_counter() - start) * 1e3)
+            results.append(matches)
+
+        radius_latencies = []
+        for seeker in seekers:
+            start = time.perf_counter()
+            index.top_k(seeker, args.k, max_distance_km=args.radius)
+            radius_latencies.append((time.perf_counter() - start) * 1e3)
+
+        line = (f"pool={size:>8}  build={build:6.1f}s  buckets={len(index._buckets):>6}  "
+                f"top-{args.k} p50={statistics.median(latencies):7.2f}ms  max={max(latencies):7.2f}ms  "
+                f"within {args.radius:g}km p50={statistics.median(radius_latencies):7.2f}ms")
+
+        if size <= args.brute_force_limit:
+            brute = []
+            # Check the timed results themselves, not a second query
+            for seeker, matches in zip(seekers[:3], results):
+                start = time.perf_counter()
+                expected = rank_candidates(seeker, pool, args.k)
+                brute.append((time.perf_counter() - start) * 1e3)
+                assert [(m['id'], m['score']) for m in expected] == [(m['id'], m['score']) for m in matches]
+                expected = rank_candidates(seeker, pool, args.k, max_distance_km=args.radius)
+                assert [(m['id'], m['score']) for m in expected] == \
+                    [(m['id'], m['score']) for m in index.top_k(seeker, args.k, max_distance_km=args.radius)]
+            line += f"  brute force p50={statistics.median(brute):8.2f}ms"
+        print(line)
+
+        # Incremental maintenance: churn 1% of the pool
+        churn = pool[: max(1, size // 100)]
+        start = time.perf_counter()
+        for profile in churn:
+            index.remove(profile['id'])
+            index.add(profile)
+        print(f"{'':15}update {len(churn)} profiles in {(time.perf_counter() - start) * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Offline top-K materialization: build time per worker count, file size and
+lookup latency versus ranking live.
+
+Writes a synthetic JSONL dump, materializes it once per ``--workers`` value
+(checking every run writes the same matches), then compares serving a
+user's top-K from the ``MatchFile`` with ranking them against the store on
+request. A sample of users is checked against ``rank_candidates`` over the
+same candidates in the same order.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_materialize --users 20000 --workers 1 2 4
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from matcher import rank_candidates
+from matcher.materialize import MatchFile, build_store, materialize, read_profiles
+
+from .corpus import make_profiles
+
+
+def write_dump(path: str, users: int, seed: int):
+    with open(path, 'w') as f:
+        for i, profile in enumerate(make_profiles(users, seed=seed)):
+            f.write(json.dumps(dict(profile, id=f"user-{i}")) + "\n")
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--top-k', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=512)
+    parser.add_argument('--checks', type=int, default=20, help='users checked against rank_candidates')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, 'profiles.jsonl')
+        write_dump(dump, args.users, args.seed)
+        start = time.perf_counter()
+        store = build_store(read_profiles(dump))
+        print(f"users={args.users}  top_k={args.top_k}  cpus={os.cpu_count()}  "
+              f"load={time.perf_counter() - start:.1f}s")
+
+        reference = None
+        baseline = None
+        for workers in args.workers:
+            path = os.path.join(tmp, f'matches-{workers}.bin')
+            stats = materialize(store, path, args.top_k, workers, args.chunk_size)
+            with open(path, 'rb') as f:
+                # Everything after the header (which holds the creation time) must match
+                body = f.read()[64:]
+            assert reference is None or body == reference, f"workers={workers} wrote different matches"
+            reference = body
+            baseline = baseline or stats['seconds']
+            print(f"workers={workers:<3} {stats['seconds']:7.2f}s  ({baseline / stats['seconds']:.2f}x)  "
+                  f"{stats['users'] / stats['seconds']:8.0f} users/s  "
+                  f"{stats['bytes'] / stats['users']:.0f}B/user")
+
+        matches = MatchFile(path)
+        profiles = {str(profile['id']): profile for profile in read_profiles(dump)}
+        order = sorted(profiles, key=lambda key: key.encode('utf-8'))
+        sample = random.Random(args.seed).sample(order, min(args.checks, len(order)))
+        for user_id in sample:
+            # File rows are in sorted id order, so ties break the same way here
+            others = [profiles[other] for other in order if other != user_id]
+            expected = rank_candidates(profiles[user_id], others, args.top_k)
+            got = matches.matches(user_id)
+            assert [m['id'] for m in got] == [m['id'] for m in expected], user_id
+            assert all(abs(g['score'] - e['score']) < 1e-3 for g, e in zip(got, expected)), user_id
+
+        user_id = sample[0]
+        lookup = best_of(lambda: matches.matches(user_id), 1000)
+        live = best_of(lambda: store.rank(profiles[user_id], args.top_k + 1), 5)
+        print(f"lookup {lookup * 1e6:.1f}us  vs  live rank {live * 1e3:.1f}ms  "
+              f"({live / lookup:.0f}x)  parity checked on {len(sample)} users")
+        matches.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Pairwise scoring cost by ``ScoringPipeline`` mode.
+
+Scores every seeker against a pool with the full payload, in score-only
+mode, and under ``min_score`` cutoffs, checking each mode against the full
+result.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_pipeline --cutoffs 60 80 90
+"""
+import argparse
+import time
+
+from matcher.scoring import DEFAULT_PIPELINE
+
+from .corpus import make_profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seekers', type=int, default=50)
+    parser.add_argument('--pool', type=int, default=1000)
+    parser.add_argument('--cutoffs', type=float, nargs='+', default=[60, 80, 90])
+    args = parser.parse_args()
+
+    seekers = make_profiles(args.seekers, seed=3)
+    pool = make_profiles(args.pool, seed=4)
+    pairs = [(seeker, candidate) for seeker in seekers for candidate in pool]
+    full = [DEFAULT_PIPELINE.score(p1, p2) for p1, p2 in pairs]
+
+    modes = [('full', DEFAULT_PIPELINE), ('score-only', DEFAULT_PIPELINE.with_options(score_only=True))]
+    modes += [(f'min_score={cutoff:g}', DEFAULT_PIPELINE.with_options(min_score=cutoff, score_only=True))
+              for cutoff in args.cutoffs]
+
+    baseline = None
+    for name, pipeline in modes:
+        start = time.perf_counter()
+        results = [pipeline.score(p1, p2) for p1, p2 in pairs]
+        per_pair = (time.perf_counter() - start) / len(pairs) * 1e6
+        baseline = baseline or per_pair
+
+        for expected, result in zip(full, results):
+            if result is None:
+                assert expected['score'] < pipeline.min_score
+            else:
+                assert result['score'] == expected['score']
+        kept = sum(result is not None for result in results)
+        print(f"{name:<14}  {per_pair:6.1f}us/pair  ({baseline / per_pair:.2f}x)  kept {kept}/{len(pairs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+What the explanation and recommendation text costs per request.
+
+Times pairwise scoring with each ``include`` choice, rendering the text
+onto an already scored (cached) result, and ``/api/submit`` end to end
+with a warm score cache, with and without text in the response. Every
+mode's score and factors are checked against the full result.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_render --pairs 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+from matcher.scoring import DEFAULT_PIPELINE
+
+from .asgi_client import ASGIClient, envelope
+from .corpus import make_profiles
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+MODES = [
+    ('full', None),
+    ('explanation', ['explanation']),
+    ('recommendations', ['recommendations']),
+    ('no text', []),
+]
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    profiles = make_profiles(args.pairs * 2, seed=6)
+    pairs = list(zip(profiles[::2], profiles[1::2]))
+    full = [DEFAULT_PIPELINE.score(p1, p2) for p1, p2 in pairs]
+
+    print("pairwise scoring:")
+    baseline = None
+    for name, include in MODES:
+        pipeline = DEFAULT_PIPELINE.with_options(include=include)
+        for expected, (p1, p2) in zip(full, pairs):
+            result = pipeline.score(p1, p2)
+            assert result['score'] == expected['score']
+            assert result['compatibility_factors'] == expected['compatibility_factors']
+        elapsed = best_of(lambda: [pipeline.score(p1, p2) for p1, p2 in pairs], args.repeat) / len(pairs) * 1e6
+        baseline = baseline or elapsed
+        print(f"  {name:<16} {elapsed:6.1f}us/pair  (saves {baseline - elapsed:5.1f}us)")
+
+    structured = [DEFAULT_PIPELINE.with_options(score_only=True).score(p1, p2) for p1, p2 in pairs]
+    assert [DEFAULT_PIPELINE.render(p1, p2, result) for (p1, p2), result in zip(pairs, structured)] == full
+    print("rendering a cached result:")
+    for name, include in MODES:
+        elapsed = best_of(lambda: [DEFAULT_PIPELINE.render(p1, p2, result, include)
+                                   for (p1, p2), result in zip(pairs, structured)], args.repeat)
+        print(f"  {name:<16} {elapsed / len(pairs) * 1e6:6.1f}us/pair")
+
+    from _app import app
+
+    client = ASGIClient(app)
+    print(f"/api/submit, score cache warm, {args.requests} requests:")
+    bodies = {name: [envelope(dict({"profile1": p1, "profile2": p2},
+                                   **({} if include is None else {"include": include})))
+                     for p1, p2 in pairs[:args.requests]]
+              for name, include in (MODES[0], MODES[-1])}
+    sizes = {}
+    for name, requests in bodies.items():
+        for body in requests:
+            client.request('POST', '/api/submit', body)
+        sizes[name] = sum(len(client.request('POST', '/api/submit', body)[1]) for body in requests) / len(requests)
+    # The modes take turns within each repeat, so machine noise hits both alike
+    elapsed = {name: [] for name in bodies}
+    for _ in range(args.repeat):
+        for name, requests in bodies.items():
+            elapsed[name].append(best_of(lambda: [client.request('POST', '/api/submit', body)
+                                                  for body in requests], 1))
+    for name in bodies:
+        print(f"  {name:<16} {min(elapsed[name]) / args.requests * 1e6:6.1f}us/request  "
+              f"{sizes[name]:6.0f}B/response")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
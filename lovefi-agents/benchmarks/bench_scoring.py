@@ -0,0 +1,167 @@
+"""
+Micro-benchmark for per-request scoring latency.
+
+Compares the old request handler, which re-defined ``CompatibilityAnalyzer``
+and its keyword tables on every POST, against the shared ``matcher`` engine
+that builds them once at import time.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_scoring --iterations 20000
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from matcher import score_profiles
+
+PROFILE1 = {'age': 28, 'interests': ['hiking', 'reading', 'cooking', 'rock climbing'], 'location': 'New York'}
+PROFILE2 = {'age': 30, 'interests': ['hiking', 'music', 'photography', 'baking'], 'location': 'New York, NY'}
+
+
+def legacy_score(profile1: Dict, profile2: Dict) -> Dict:
+    """Scoring as the old handler did it: every table and class built per call"""
+    class CompatibilityAnalyzer:
+        @staticmethod
+        def analyze_interests(interests1: List[str], interests2: List[str]) -> Dict:
+            interest_categories = {
+                'outdoor': ['hiking', 'camping', 'climbing', 'running', 'cycling', 'surfing', 'skiing'],
+                'creative': ['art', 'music', 'writing', 'photography', 'painting', 'drawing', 'crafts'],
+                'intellectual': ['reading', 'chess', 'debate', 'learning', 'philosophy', 'science'],
+                'social': ['dancing', 'parties', 'networking', 'volunteering', 'community'],
+                'culinary': ['cooking', 'baking', 'wine', 'restaurants', 'food'],
+                'fitness': ['gym', 'yoga', 'pilates', 'sports', 'martial arts', 'crossfit'],
+                'tech': ['programming', 'gaming', 'gadgets', 'ai', 'blockchain', 'coding']
+            }
+
+            def categorize_interests(interests):
+                categories = {}
+                for interest in interests:
+                    for category, keywords in interest_categories.items():
+                        if any(keyword in interest.lower() for keyword in keywords):
+                            categories.setdefault(category, []).append(interest)
+                return categories
+
+            cats1 = categorize_interests(interests1)
+            cats2 = categorize_interests(interests2)
+            common_categories = set(cats1.keys()) & set(cats2.keys())
+            total_categories = set(cats1.keys()) | set(cats2.keys())
+            direct_overlap = len(set(interests1) & set(interests2))
+            semantic_overlap = len(common_categories)
+            return {
+                'direct_matches': direct_overlap,
+                'semantic_matches': semantic_overlap,
+                'total_interests': len(set(interests1) | set(interests2)),
+                'common_categories': list(common_categories),
+                'compatibility_score': (direct_overlap * 2 + semantic_overlap) / len(total_categories) if total_categories else 0
+            }
+
+        @staticmethod
+        def analyze_age_compatibility(age1: int, age2: int) -> Dict:
+            age_diff = abs(age1 - age2)
+            if age_diff <= 2:
+                compatibility, reason = 1.0, "Very close in age - excellent life stage alignment"
+            elif age_diff <= 5:
+                compatibility, reason = 0.8, "Good age compatibility - similar life experiences"
+            elif age_diff <= 10:
+                compatibility, reason = 0.6 - (age_diff - 5) * 0.08, "Moderate age gap - some life stage differences"
+            else:
+                compatibility, reason = max(0.2, 0.4 - (age_diff - 10) * 0.02), "Significant age gap - may have different priorities"
+            return {'age_difference': age_diff, 'compatibility_score': compatibility,
+                    'reason': reason, 'life_stage_match': compatibility > 0.7}
+
+        @staticmethod
+        def analyze_location(location1: str, location2: str) -> Dict:
+            loc1_clean = location1.lower().strip()
+            loc2_clean = location2.lower().strip()
+            if loc1_clean == loc2_clean:
+                return {'match_type': 'exact', 'compatibility_score': 1.0, 'reason': 'Same location - easy to meet'}
+            major_cities = ['new york', 'los angeles', 'chicago', 'houston', 'phoenix', 'philadelphia']
+            for city in major_cities:
+                if city in loc1_clean and city in loc2_clean:
+                    return {'match_type': 'same_city', 'compatibility_score': 0.8,
+                            'reason': f'Same metropolitan area ({city}) - manageable distance'}
+            states = ['california', 'texas', 'florida', 'new york', 'illinois']
+            for state in states:
+                if state in loc1_clean and state in loc2_clean:
+                    return {'match_type': 'same_state', 'compatibility_score': 0.4,
+                            'reason': f'Same state ({state}) - possible for long-distance'}
+            return {'match_type': 'different', 'compatibility_score': 0.1,
+                    'reason': 'Different regions - long-distance challenges'}
+
+    def generate_recommendations(profile1: Dict, profile2: Dict, compatibility_factors: Dict) -> List[str]:
+        recommendations = []
+        if compatibility_factors['interests']['direct_matches'] > 0:
+            common_interests = list(set(profile1.get('interests', [])) & set(profile2.get('interests', [])))
+            recommendations.append(f"Plan activities around shared interests: {', '.join(common_interests[:3])}")
+        if compatibility_factors['age']['life_stage_match']:
+            recommendations.append("Your similar life stages create great potential for shared goals")
+        else:
+            recommendations.append("Embrace the different perspectives your age difference brings")
+        match_type = compatibility_factors['location']['match_type']
+        if match_type == 'exact':
+            recommendations.append("Being in the same area makes meeting up easy - suggest local date spots")
+        elif match_type == 'same_city':
+            recommendations.append("Explore different neighborhoods together to bridge your local differences")
+        return recommendations
+
+    analyzer = CompatibilityAnalyzer()
+    age_analysis = analyzer.analyze_age_compatibility(profile1.get('age', 25), profile2.get('age', 25))
+    interest_analysis = analyzer.analyze_interests(profile1.get('interests', []), profile2.get('interests', []))
+    location_analysis = analyzer.analyze_location(profile1.get('location', ''), profile2.get('location', ''))
+    final_score = max(0, min(100, (
+        age_analysis['compatibility_score'] * 0.25 * 100 +
+        interest_analysis['compatibility_score'] * 0.50 * 100 +
+        location_analysis['compatibility_score'] * 0.25 * 100
+    )))
+    compatibility_factors = {'age': age_analysis, 'interests': interest_analysis,
+                             'location': location_analysis, 'overall_score': final_score}
+    explanation = f"""Compatibility Analysis:
+• Age: {age_analysis['reason']} (Score: {age_analysis['compatibility_score']*100:.0f}/100)
+• Interests: {interest_analysis['direct_matches']} direct matches, {interest_analysis['semantic_matches']} category overlaps (Score: {interest_analysis['compatibility_score']*100:.0f}/100)
+• Location: {location_analysis['reason']} (Score: {location_analysis['compatibility_score']*100:.0f}/100)"""
+    return {
+        "score": final_score,
+        "explanation": explanation,
+        "compatibility_factors": compatibility_factors,
+        "recommendations": generate_recommendations(profile1, profile2, compatibility_factors)
+    }
+
+
+def measure(fn: Callable[[Dict, Dict], Dict], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(PROFILE1, PROFILE2)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(name: str, samples: List[float]) -> float:
+    samples = sorted(samples)
+    mean = statistics.fmean(samples)
+    p50 = samples[len(samples) // 2]
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{name:<10} mean={mean:8.2f}us  p50={p50:8.2f}us  p99={p99:8.2f}us")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    assert legacy_score(PROFILE1, PROFILE2)['score'] == score_profiles(PROFILE1, PROFILE2)['score']
+
+    # Warm up both paths before timing
+    measure(legacy_score, 1000)
+    measure(score_profiles, 1000)
+
+    before = report('before', measure(legacy_score, args.iterations))
+    after = report('after', measure(score_profiles, args.iterations))
+    print(f"speedup    {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
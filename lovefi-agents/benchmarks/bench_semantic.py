@@ -0,0 +1,88 @@
+"""
+Semantic interest mode: what it matches and what it costs.
+
+Prints the embedding similarity of a few interest pairs the keyword
+categories miss or conflate, checks that bulk semantic scores equal the
+pairwise ``SEMANTIC_PIPELINE`` ones, then times pairwise scoring and pool
+ranking with keyword categories against embedding similarity, and the
+embedding cost of a cold versus warm vector cache.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_semantic --pool 1000 10000 100000
+"""
+import argparse
+import time
+
+from matcher import rank_candidates, score_matrix
+from matcher.scoring import DEFAULT_PIPELINE
+from matcher.semantic import SEMANTIC_PIPELINE, InterestEmbedder
+
+from .corpus import make_profiles
+
+EXAMPLES = [
+    ('bouldering', 'climbing'),
+    ('indoor bouldering', 'rock climbing'),
+    ('sourdough', 'baking'),
+    ('jazz', 'live music'),
+    ('climbing', 'hiking'),
+    ('climbing', 'programming'),
+    ('pottery', 'painting'),
+]
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pool', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    embedder = InterestEmbedder.from_concepts()
+    print(f"embedder: {len(embedder)} terms x {embedder.dim} dims, built in "
+          f"{(time.perf_counter() - start) * 1e3:.1f}ms")
+    for a, b in EXAMPLES:
+        print(f"  {a!r:>20} ~ {b!r:<16} {embedder.similarity([a], [b]):.2f}")
+
+    profiles = make_profiles(max(args.pool) + 1, seed=args.seed)
+    seeker, pool = profiles[0], profiles[1:]
+
+    sample = pool[:500]
+    bulk = score_matrix([seeker], sample, semantic=True)[0]
+    worst = max(abs(SEMANTIC_PIPELINE.score(seeker, candidate)['score'] - score)
+                for candidate, score in zip(sample, bulk))
+    assert worst < 1e-3, worst
+    print(f"parity ok: bulk vs pairwise semantic scores within {worst:.1e}")
+
+    pairs = list(zip(pool[:1000:2], pool[1:1000:2]))
+    for name, pipeline in (('keywords', DEFAULT_PIPELINE), ('semantic', SEMANTIC_PIPELINE)):
+        elapsed = best_of(lambda: [pipeline.score(p1, p2) for p1, p2 in pairs], args.repeat)
+        print(f"pairwise {name:<9} {elapsed / len(pairs) * 1e6:6.1f}us/pair")
+
+    vocabulary = sorted({interest for profile in pool for interest in profile.get('interests', [])})
+    cold = InterestEmbedder.from_concepts()
+    elapsed = best_of(lambda: [cold.vector(interest) for interest in vocabulary], 1)
+    warm = best_of(lambda: [cold.vector(interest) for interest in vocabulary], args.repeat)
+    print(f"embedding {len(vocabulary)} distinct interests: cold {elapsed * 1e3:.1f}ms, "
+          f"cached {warm * 1e3:.2f}ms")
+
+    for size in args.pool:
+        candidates = pool[:size]
+        keywords = best_of(lambda: rank_candidates(seeker, candidates, 10), args.repeat)
+        semantic = best_of(lambda: rank_candidates(seeker, candidates, 10, semantic=True), args.repeat)
+        print(f"pool={size:>7}  top-10 keywords={keywords * 1e3:7.1f}ms  semantic={semantic * 1e3:7.1f}ms  "
+              f"({semantic / keywords:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
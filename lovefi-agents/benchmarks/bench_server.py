@@ -0,0 +1,155 @@
+"""
+Requests/sec of the self-hosted server as worker processes are added.
+
+For each worker count, starts ``api/index.py --workers N`` on a local port
+and drives it for ``--duration`` seconds from ``--clients`` load-generator
+processes, each holding ``--connections`` keep-alive connections. Reports
+throughput, latency percentiles and non-200 responses per worker count.
+
+The load generators share the machine with the server: for a fair scaling
+curve give them cores of their own (or run them from another host against
+``--port``), and do not expect scaling beyond the number of free cores.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_server --workers 1 2 4 --route submit
+    python -m benchmarks.bench_server --workers 1 2 --route batch --batch-size 200
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from .asgi_client import envelope
+from .corpus import make_profiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_bodies(route: str, count: int, batch_size: int, seed: int) -> List[bytes]:
+    profiles = make_profiles(max(count * 2, batch_size + count), seed=seed)
+    if route == 'submit':
+        # Distinct pairs, so the score cache does not answer for the server
+        return [envelope({"profile1": profiles[2 * i], "profile2": profiles[2 * i + 1]}) for i in range(count)]
+    pool = profiles[count:count + batch_size]
+    return [envelope({"seeker": profiles[i], "candidates": pool, "top_k": 10}) for i in range(count)]
+
+
+def drive(port: int, path: str, bodies: List[bytes], duration: float, connections: int) -> Dict:
+    """One load-generator process: ``connections`` threads looping over ``bodies``"""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def loop(offset):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, failed, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            body = bodies[i % len(bodies)]
+            i += connections
+            begin = time.perf_counter()
+            try:
+                conn.request("POST", path, body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - begin)
+            else:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=loop, args=(n,)) for n in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'latencies': latencies, 'errors': errors[0]}
+
+
+def wait_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def run(workers: int, args, bodies: List[bytes]) -> Dict:
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'api', 'index.py'), '--workers', str(workers),
+         '--host', '127.0.0.1', '--port', str(args.port), '--log-level', 'warning'],
+        # Measure capacity, not backpressure: room for every open connection
+        env={**os.environ, 'MATCHER_QUEUE_DEPTH': str(args.clients * args.connections)},
+    )
+    try:
+        wait_ready(args.port)
+        path = f"/api/{args.route}"
+        # Warm every worker's connection handling before measuring
+        drive(args.port, path, bodies, 1.0, args.connections)
+
+        per_client = [bodies[i::args.clients] for i in range(args.clients)]
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.starmap(drive, [(args.port, path, chunk, args.duration, args.connections)
+                                           for chunk in per_client])
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(60)
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3 if latencies else float('nan')
+
+    return {
+        'rps': len(latencies) / args.duration,
+        'p50_ms': percentile(0.50),
+        'p99_ms': percentile(0.99),
+        'errors': sum(result['errors'] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--route', choices=['submit', 'batch'], default='submit')
+    parser.add_argument('--batch-size', type=int, default=200, help='candidate pool per batch request')
+    parser.add_argument('--clients', type=int, default=2, help='load-generator processes')
+    parser.add_argument('--connections', type=int, default=8, help='keep-alive connections per client')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds measured per worker count')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    bodies = request_bodies(args.route, 2000, args.batch_size, args.seed)
+    print(f"route=/api/{args.route}  cpus={os.cpu_count()}  clients={args.clients}x{args.connections}  "
+          f"duration={args.duration:g}s")
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, args, bodies)
+        baseline = baseline or result['rps']
+        print(f"workers={workers:<3} {result['rps']:8.0f} req/s  ({result['rps'] / baseline:.2f}x)  "
+              f"p50={result['p50_ms']:.1f}ms  p99={result['p99_ms']:.1f}ms  errors={result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
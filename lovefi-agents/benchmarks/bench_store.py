@@ -0,0 +1,81 @@
+"""
+Memory per profile and ranking time, list of dicts vs ``ProfileStore``.
+
+Profiles are round-tripped through JSON first so every dict owns its own
+strings, as it would after parsing a request body.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_store --sizes 100000 1000000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from matcher import rank_candidates
+from matcher.store import ProfileStore
+
+from .corpus import make_profiles
+
+
+def parsed_profiles(size: int, chunk: int = 50000):
+    profiles = []
+    for start in range(0, size, chunk):
+        profiles.extend(json.loads(json.dumps(make_profiles(min(chunk, size - start), seed=start))))
+    for i, profile in enumerate(profiles):
+        profile['id'] = f"user-{i}"
+    return profiles
+
+
+def build_store(profiles):
+    store = ProfileStore()
+    for profile in profiles:
+        store.add(profile)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--queries', type=int, default=5)
+    args = parser.parse_args()
+
+    seekers = make_profiles(args.queries, seed=99)
+    for seeker in seekers:
+        del seeker['id']
+
+    for size in args.sizes:
+        gc.collect()
+        tracemalloc.start()
+        profiles = parsed_profiles(size)
+        gc.collect()
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        # Only the ids are shared with the dicts, and the store keeps those
+        store = build_store(profiles)
+        del profiles
+        gc.collect()
+        store_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        profiles = parsed_profiles(size)
+        before, after = [], []
+        for seeker in seekers:
+            start = time.perf_counter()
+            expected = rank_candidates(seeker, profiles, 10)
+            before.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            got = store.rank(seeker, 10)
+            after.append(time.perf_counter() - start)
+            assert [(m['id'], m['score']) for m in expected] == [(m['id'], m['score']) for m in got]
+
+        print(f"profiles={size:>8}  dicts={dict_bytes / size:6.0f}B/profile  "
+              f"store={store_bytes / size:6.0f}B/profile ({dict_bytes / store_bytes:.1f}x smaller)  "
+              f"top-10 {min(before) * 1e3:7.1f}ms -> {min(after) * 1e3:7.1f}ms")
+        del profiles, store
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Parity check and benchmark for interest categorization.
+
+Verifies that the Aho-Corasick ``KeywordMatcher`` reproduces the old nested
+``keyword in interest.lower()`` scan exactly, then times both on the shipped
+taxonomy and on a synthetic taxonomy grown to ``--categories`` entries.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_taxonomy --categories 200
+"""
+import argparse
+import random
+import string
+import time
+from typing import Dict, List
+
+from matcher import INTEREST_CATEGORIES, KeywordMatcher, categorize_interests
+
+PARITY_INTERESTS = [
+    'hiking', 'Rock Climbing', 'martial arts', 'Painting', 'AI research', 'training',
+    'wine tasting', 'street food', 'board gaming', 'trail running', 'crossfit', 'CHESS',
+    'party planning', 'parties', 'community theatre', 'learning languages', '', 'xyz',
+    'blockchain art', 'science fiction writing', 'photography & cycling', 'yogalates',
+]
+
+
+def legacy_categorize(interests: List[str], taxonomy: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    categories = {}
+    for interest in interests:
+        for category, keywords in taxonomy.items():
+            if any(keyword in interest.lower() for keyword in keywords):
+                categories.setdefault(category, []).append(interest)
+    return categories
+
+
+def automaton_categorize(interests: List[str], matcher: KeywordMatcher) -> Dict[str, List[str]]:
+    categories = {}
+    for interest in interests:
+        for category in matcher.names(matcher.mask(interest)):
+            categories.setdefault(category, []).append(interest)
+    return categories
+
+
+def random_word(rng: random.Random, low: int = 3, high: int = 9) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def synthetic_taxonomy(rng: random.Random, categories: int, keywords: int) -> Dict[str, List[str]]:
+    taxonomy = dict(INTEREST_CATEGORIES)
+    for i in range(categories - len(taxonomy)):
+        taxonomy[f'category_{i}'] = [random_word(rng) for _ in range(keywords)]
+    return taxonomy
+
+
+def check_parity(taxonomy: Dict[str, List[str]], interests: List[str]):
+    matcher = KeywordMatcher(taxonomy)
+    for interest in interests:
+        expected = legacy_categorize([interest], taxonomy)
+        actual = automaton_categorize([interest], matcher)
+        assert expected == actual, f"{interest!r}: {expected} != {actual}"
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--interests', type=int, default=5000)
+    parser.add_argument('--categories', type=int, default=200)
+    parser.add_argument('--keywords', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [kw for kws in INTEREST_CATEGORIES.values() for kw in kws]
+    interests = [
+        ' '.join(rng.choice([rng.choice(vocabulary), random_word(rng)]) for _ in range(rng.randint(1, 3)))
+        for _ in range(args.interests)
+    ]
+    large = synthetic_taxonomy(rng, args.categories, args.keywords)
+
+    check_parity(INTEREST_CATEGORIES, PARITY_INTERESTS + interests)
+    check_parity(large, PARITY_INTERESTS + interests)
+    assert categorize_interests(PARITY_INTERESTS) == legacy_categorize(PARITY_INTERESTS, INTEREST_CATEGORIES)
+    print(f"parity ok on {len(PARITY_INTERESTS) + len(interests)} interests")
+
+    for name, taxonomy in (('shipped', INTEREST_CATEGORIES), (f'{len(large)} categories', large)):
+        matcher = KeywordMatcher(taxonomy)
+        before = timed(legacy_categorize, interests, taxonomy)
+        after = timed(automaton_categorize, interests, matcher)
+        per = 1e6 / len(interests)
+        print(f"{name:<16} nested scan={before * per:7.2f}us/interest  "
+              f"automaton={after * per:7.2f}us/interest  speedup={before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
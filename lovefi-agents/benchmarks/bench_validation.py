@@ -0,0 +1,89 @@
+"""
+Cost of the request guards: how fast bad requests are refused and what
+validation adds to good ones.
+
+Sends hostile requests through the FastAPI app in-process (an oversized
+body, a profile with ``--interests`` interests, an overlong interest
+string) and compares the time to refuse each with the time to score the
+same profile unchecked. Then times decoding a valid batch payload with
+``orjson`` alone against decoding and validating it in one pass.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.bench_validation --interests 100000 --pool 10000
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+from matcher import score_profiles
+from matcher.envelope import loads
+from matcher.validation import LIMITS, validate_encoded
+
+from .asgi_client import ASGIClient, envelope
+from .corpus import interest_vocabulary, make_profiles
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--interests', type=int, default=100000, help='interests in the hostile profile')
+    parser.add_argument('--pool', type=int, default=10000, help='candidates in the valid batch payload')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from _app import app
+
+    client = ASGIClient(app)
+    vocabulary = interest_vocabulary()
+    hostile = {"age": 30, "location": "Chicago",
+               "interests": [vocabulary[i % len(vocabulary)] + str(i) for i in range(args.interests)]}
+    peer = make_profiles(1, seed=1)[0]
+
+    print(f"limits: body={LIMITS.max_body_bytes}B batch={LIMITS.max_batch_bytes}B "
+          f"interests={LIMITS.max_interests} string={LIMITS.max_string_length} candidates={LIMITS.max_candidates}")
+
+    cases = [
+        ('oversized body', envelope({"profile1": hostile, "profile2": peer})),
+        (f'{LIMITS.max_interests + 1} interests', envelope({
+            "profile1": dict(hostile, interests=hostile['interests'][:LIMITS.max_interests + 1]), "profile2": peer})),
+        ('overlong interest', envelope({
+            "profile1": dict(peer, interests=['x' * (LIMITS.max_string_length + 1)]), "profile2": peer})),
+    ]
+    for name, body in cases:
+        status = client.request('POST', '/api/submit', body)[0]
+        elapsed = best_of(lambda: client.request('POST', '/api/submit', body), args.repeat)
+        print(f"{name:<20} {len(body):>10}B  -> {status}  in {elapsed * 1e3:7.2f}ms")
+
+    unchecked = best_of(lambda: score_profiles(hostile, peer), 1)
+    print(f"scoring the {args.interests}-interest profile unchecked: {unchecked * 1e3:.1f}ms")
+
+    profiles = make_profiles(args.pool + 1, seed=2)
+    payload = base64.b64encode(json.dumps({"seeker": profiles[0], "candidates": profiles[1:], "top_k": 10})
+                               .encode()).decode('ascii')
+    decode = best_of(lambda: loads(base64.b64decode(payload)), args.repeat)
+    checked = best_of(lambda: validate_encoded('batch', payload), args.repeat)
+    print(f"batch payload, {args.pool} candidates: decode {decode * 1e3:.1f}ms, "
+          f"decode+validate {checked * 1e3:.1f}ms ({checked / decode:.2f}x)")
+
+    small = envelope({"profile1": profiles[0], "profile2": profiles[1]})
+    submit = best_of(lambda: client.request('POST', '/api/submit', small), args.repeat * 20)
+    print(f"valid /api/submit end to end (score cache warm): {submit * 1e3:.2f}ms")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
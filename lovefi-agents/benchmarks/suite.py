@@ -0,0 +1,223 @@
+"""
+Offline regression suite for the scoring core and the API entry points.
+
+Builds a synthetic corpus, then measures each scenario's throughput,
+latency percentiles and peak traced memory:
+
+    core.score_profiles        pairwise scoring with the full payload
+    core.rank_candidates       one seeker against a --batch-size pool
+    core.index_top_k           top-10 from a CandidateIndex of the corpus
+    simple.calculate_compatibility   api/index-simple.py's scorer
+    api.health                 GET /api through the ASGI app
+    api.submit                 POST /api/submit (distinct pairs, cache misses)
+    api.batch                  POST /api/batch with a --batch-size pool
+
+Results are compared against a stored baseline and the run exits non-zero
+if any scenario is slower or larger than the baseline by more than
+``--tolerance``. Baselines are machine-specific: record one with
+``--save-baseline`` on the machine that runs the comparison.
+
+Run from the ``lovefi-agents`` directory:
+
+    python -m benchmarks.suite --save-baseline     # record
+    python -m benchmarks.suite                     # compare
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from .asgi_client import ASGIClient, envelope, open_envelope
+from .corpus import interest_vocabulary, make_profiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# Metric -> True if higher is better
+METRICS = {'ops_per_sec': True, 'p95_ms': False, 'peak_kb': False}
+
+
+def load_entry_point(filename: str):
+    path = os.path.join(ROOT, 'api', filename)
+    spec = importlib.util.spec_from_file_location(f"bench_{filename.replace('-', '_')[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_corpus(args) -> List[Dict]:
+    vocabulary = interest_vocabulary()
+    vocabulary += [f'interest {i}' for i in range(max(0, args.vocabulary - len(vocabulary)))]
+    return make_profiles(args.profiles, seed=args.seed, min_interests=args.min_interests,
+                         max_interests=args.max_interests, vocabulary=vocabulary[:args.vocabulary],
+                         skew=args.skew)
+
+
+def scenarios(corpus: List[Dict], args) -> Dict[str, Callable[[int], None]]:
+    """Name -> ``run(i)`` performing the i-th operation of the scenario"""
+    from matcher import CandidateIndex, rank_candidates, score_profiles
+
+    half = len(corpus) // 2
+    seekers, candidates = corpus[:half], corpus[half:]
+    pool = candidates[:args.batch_size]
+
+    def pair(i):
+        return seekers[i % len(seekers)], candidates[(i * 7919) % len(candidates)]
+
+    index = CandidateIndex()
+    for profile in corpus:
+        index.add(profile)
+
+    simple = load_entry_point('index-simple.py').handler
+    client = ASGIClient(load_entry_point('index.py').app)
+    batch_bodies = [envelope({"seeker": seekers[i], "candidates": pool, "top_k": 10})
+                    for i in range(min(len(seekers), 64))]
+
+    def submit(i):
+        profile1, profile2 = pair(i)
+        status, content = client.request("POST", "/api/submit", envelope({"profile1": profile1, "profile2": profile2}))
+        assert status == 200 and open_envelope(content)['score'] == score_profiles(profile1, profile2)['score']
+
+    def batch(i):
+        status, content = client.request("POST", "/api/batch", batch_bodies[i % len(batch_bodies)])
+        assert status == 200 and len(open_envelope(content)['matches']) == min(10, len(pool))
+
+    def health(i):
+        assert client.request("GET", "/api")[0] == 200
+
+    return {
+        'core.score_profiles': lambda i: score_profiles(*pair(i)),
+        'core.rank_candidates': lambda i: rank_candidates(seekers[i % len(seekers)], pool, 10),
+        'core.index_top_k': lambda i: index.top_k(seekers[i % len(seekers)], 10),
+        'simple.calculate_compatibility': lambda i: simple.calculate_compatibility(None, *pair(i)),
+        'api.health': health,
+        'api.submit': submit,
+        'api.batch': batch,
+    }
+
+
+def measure(run: Callable[[int], None], iterations: int, offset: int) -> Dict[str, float]:
+    for i in range(min(50, iterations // 10)):
+        run(offset + i)
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        begin = time.perf_counter()
+        run(offset + i)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+
+    # Memory in a separate, shorter pass: tracing slows everything down
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for i in range(min(iterations, 200)):
+        run(offset + iterations + i)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3
+
+    return {
+        'ops_per_sec': iterations / elapsed,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': statistics.fmean(latencies) * 1e3,
+        'peak_kb': peak / 1024,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = expected[metric], result[metric]
+            if higher_is_better:
+                regressed = new < old * (1 - tolerance)
+            else:
+                # Small absolute values are noise: ignore sub-0.05ms and sub-64KB moves
+                floor = 0.05 if metric.endswith('_ms') else 64
+                regressed = new > old * (1 + tolerance) and new - old > floor
+            if regressed:
+                regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=10000, help='corpus size')
+    parser.add_argument('--min-interests', type=int, default=1)
+    parser.add_argument('--max-interests', type=int, default=8)
+    parser.add_argument('--vocabulary', type=int, default=len(interest_vocabulary()),
+                        help='distinct interests; extra ones are synthetic tail interests')
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of interest popularity (0 = uniform)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=200, help='candidate pool per batch request')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--only', nargs='+', help='run only these scenarios')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.30,
+                        help='allowed fractional regression before failing')
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in
+              ('profiles', 'min_interests', 'max_interests', 'vocabulary', 'skew', 'seed', 'batch_size', 'iterations')}
+    corpus = build_corpus(args)
+    runs = scenarios(corpus, args)
+    if args.only:
+        runs = {name: run for name, run in runs.items() if name in args.only}
+
+    results = {}
+    print(f"{'scenario':<32}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak KB':>10}")
+    for offset, (name, run) in enumerate(runs.items()):
+        result = results[name] = measure(run, args.iterations, offset * args.iterations * 3)
+        print(f"{name:<32}{result['ops_per_sec']:>10.0f}{result['p50_ms']:>9.3f}{result['p95_ms']:>9.3f}"
+              f"{result['p99_ms']:>9.3f}{result['peak_kb']:>10.0f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'config': config,
+                'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'cpus': os.cpu_count()},
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; record one with --save-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline['config'] != config:
+        sys.exit(f"baseline was recorded with {baseline['config']}, not {config}")
+
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nno regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,20 @@
 from uagents import Agent, Context, Model, Protocol
 from uagents.setup import fund_agent_if_low
-from pydantic import BaseModel
-from typing import Dict, List
+from matcher import rank_candidates, score_profiles
+from matcher.cache import pair_key
+from matcher.coalesce import SingleFlight, payload_key
+from matcher.models import (BatchMatchingRequest, BatchMatchingResponse, MatchingBusy, MatchingRejected,
+                            MatchingRequest, MatchingResponse)
+from matcher.validation import RequestRejected, record_rejection, validate
+from matcher.workers import PoolBusy, ScoringPool
 
-# Define models (unchanged from your corrected code)
-class MatchingRequest(BaseModel):
-    profile1: Dict = {}
-    profile2: Dict = {}
+# Scoring runs off the event loop; tune with MATCHER_WORKERS,
+# MATCHER_QUEUE_DEPTH and MATCHER_POOL (thread or process)
+scoring_pool = ScoringPool.from_env()
 
-class MatchingResponse(BaseModel):
-    score: float
-    explanation: str
-    compatibility_factors: Dict
-    recommendations: List[str]
+# Identical requests that arrive while one is being scored share its result
+matching_flight = SingleFlight()
+batch_flight = SingleFlight()
 
 # Create the agent
 agent = Agent(
@@ -31,18 +33,49 @@ async def log_agent_address(ctx: Context):
     ctx.logger.info(f"Dating Matcher Agent started with address: {agent.address}")
     ctx.logger.info(f"Agent Inspector available at: https://agentverse.ai/inspector/{agent.address}")
 
-# Existing handler for matching requests (abbreviated for brevity)
-@protocol.on_message(model=MatchingRequest, replies=MatchingResponse)
+@agent.on_event("shutdown")
+async def stop_scoring_pool(ctx: Context):
+    scoring_pool.shutdown(wait=False)
+
+@protocol.on_message(model=MatchingRequest, replies={MatchingResponse, MatchingBusy, MatchingRejected})
 async def handle_matching_request(ctx: Context, sender: str, msg: MatchingRequest):
     ctx.logger.info(f"Received matching request from {sender}")
-    # Your existing logic here...
-    response = MatchingResponse(
-        score=0.0,  # Placeholder; replace with your logic
-        explanation="Test response",
-        compatibility_factors={},
-        recommendations=["Test recommendation"]
-    )
-    await ctx.send(sender, response)
+    try:
+        checked = validate('matching', msg.model_dump())
+    except RequestRejected as e:
+        record_rejection('agent_matching', e)
+        ctx.logger.warning(f"Rejecting matching request from {sender}: {e}")
+        await ctx.send(sender, MatchingRejected(reason=str(e)))
+        return
+    profile1, profile2 = checked['profile1'], checked['profile2']
+    try:
+        result = await matching_flight.run(pair_key(profile1, profile2),
+                                           scoring_pool.submit, score_profiles, profile1, profile2)
+    except PoolBusy as e:
+        ctx.logger.warning(f"Rejecting matching request from {sender}: {e}")
+        await ctx.send(sender, MatchingBusy(reason=str(e), retry_after=1.0))
+        return
+    await ctx.send(sender, MatchingResponse(**result))
+
+@protocol.on_message(model=BatchMatchingRequest, replies={BatchMatchingResponse, MatchingBusy, MatchingRejected})
+async def handle_batch_matching_request(ctx: Context, sender: str, msg: BatchMatchingRequest):
+    ctx.logger.info(f"Received batch matching request from {sender} ({len(msg.candidates)} candidates)")
+    payload = msg.model_dump()
+    try:
+        checked = validate('batch', payload)
+    except RequestRejected as e:
+        record_rejection('agent_batch', e)
+        ctx.logger.warning(f"Rejecting batch matching request from {sender}: {e}")
+        await ctx.send(sender, MatchingRejected(reason=str(e)))
+        return
+    try:
+        matches = await batch_flight.run(payload_key(payload), scoring_pool.submit, rank_candidates,
+                                         checked['seeker'], checked['candidates'], msg.top_k, msg.max_distance_km)
+    except PoolBusy as e:
+        ctx.logger.warning(f"Rejecting batch matching request from {sender}: {e}")
+        await ctx.send(sender, MatchingBusy(reason=str(e), retry_after=1.0))
+        return
+    await ctx.send(sender, BatchMatchingResponse(matches=matches))
 
 # Include the protocol
 agent.include(protocol)
@@ -0,0 +1,95 @@
+"""
+Shared compatibility scoring engine for the LoveFi matcher.
+
+Imported once at startup by the Vercel functions under ``api/`` and by the
+uAgent in ``dating_matcher.py``.
+
+Names are resolved lazily on first access, so an entry point that only
+needs ``quick_score`` does not pay for NumPy or the batch and index modules
+on a cold start.
+"""
+import importlib
+
+_EXPORTS = {
+    "INTEREST_CATEGORIES": ".scoring",
+    "TAXONOMY": ".scoring",
+    "CompatibilityAnalyzer": ".scoring",
+    "categorize_interests": ".scoring",
+    "generate_recommendations": ".scoring",
+    "interest_mask": ".scoring",
+    "quick_score": ".scoring",
+    "score_profiles": ".scoring",
+    "ScoringPipeline": ".scoring",
+    "Stage": ".scoring",
+    "template": ".scoring",
+    "KeywordMatcher": ".taxonomy",
+    "iter_scores": ".batch",
+    "rank_candidates": ".batch",
+    "rank_matrix": ".batch",
+    "score_matrix": ".batch",
+    "CandidateIndex": ".index",
+    "IncrementalScorer": ".incremental",
+    "ProfileStore": ".store",
+    "InterestEmbedder": ".semantic",
+    "MemoryBackend": ".cache",
+    "ScoreCache": ".cache",
+    "SQLiteBackend": ".cache",
+    "pair_key": ".cache",
+}
+
+__all__ = [
+    "INTEREST_CATEGORIES",
+    "TAXONOMY",
+    "CandidateIndex",
+    "CompatibilityAnalyzer",
+    "IncrementalScorer",
+    "InterestEmbedder",
+    "KeywordMatcher",
+    "MemoryBackend",
+    "ProfileStore",
+    "SQLiteBackend",
+    "ScoreCache",
+    "ScoringPipeline",
+    "Stage",
+    "categorize_interests",
+    "generate_recommendations",
+    "interest_mask",
+    "iter_scores",
+    "pair_key",
+    "quick_score",
+    "rank_candidates",
+    "rank_matrix",
+    "score_matrix",
+    "score_profiles",
+    "template",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+def preload():
+    """
+    Import every submodule and build the lookup tables they fill lazily,
+    e.g. at the start of a long-running process or before forking workers.
+    """
+    for name in __all__:
+        __getattr__(name)
+
+    from .geo import GAZETTEER
+    from .scoring import INTEREST_CATEGORIES, interest_mask
+
+    GAZETTEER.compile_scanners()
+    for keywords in INTEREST_CATEGORIES.values():
+        for keyword in keywords:
+            interest_mask(keyword)
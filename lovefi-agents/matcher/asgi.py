@@ -0,0 +1,53 @@
+import threading
+from typing import Callable, Dict, Tuple
+
+# (status, body, content type)
+StaticResponse = Tuple[int, bytes, str]
+
+
+class LazyApp:
+    """
+    ASGI front that defers importing the real application.
+
+    Requests matching ``routes`` (keyed by ``(method, path)``) are answered
+    directly by a callable returning a ``StaticResponse``, without touching
+    the application. Anything else, including lifespan events, triggers
+    ``factory()`` once and is forwarded to the app it returns. On a
+    serverless cold start this keeps heavy framework imports off health
+    checks and other trivial routes.
+    """
+
+    def __init__(self, factory: Callable[[], Callable], routes: Dict[Tuple[str, str], Callable[[], StaticResponse]] = None):
+        self.factory = factory
+        self.routes = routes or {}
+        self._app = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._app is not None
+
+    def load(self) -> Callable:
+        """Import and build the application now if it is not loaded yet"""
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self.factory()
+        return self._app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            route = self.routes.get((scope['method'], scope['path']))
+            if route is not None:
+                status, body, content_type = route()
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': [
+                        (b'content-type', content_type.encode('latin-1')),
+                        (b'content-length', str(len(body)).encode('latin-1')),
+                    ],
+                })
+                await send({'type': 'http.response.body', 'body': body})
+                return
+        await self.load()(scope, receive, send)
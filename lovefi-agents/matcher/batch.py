@@ -0,0 +1,305 @@
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from .geo import LocationKeys, location_keys, location_score, within_radius
+from .scoring import AGE_WEIGHT, INTEREST_WEIGHT, LOCATION_WEIGHT, interest_mask
+from .taxonomy import popcount
+
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to pure-Python bitsets if numpy is not available
+    np = None
+
+# Seeker x candidate pairs scored per block in ``_scores``
+_BLOCK_PAIRS = 1 << 20
+
+
+class EncodedProfiles:
+    """
+    Column-oriented encoding of a list of profiles for bulk scoring.
+
+    Each profile is reduced once to its age, a category bitmask, an interest
+    bitset over a shared vocabulary and an id into a shared table of
+    normalized locations, so pairwise scores become integer and array
+    operations instead of set rebuilding. With NumPy the interest bitsets
+    are also kept as sparse ``(row, vocabulary index)`` pairs: a pool only
+    records the interests it shares with the seekers' vocabulary, so its
+    size follows the matches rather than pool x vocabulary. Without
+    ``interests`` the category masks and interest bitsets are left empty,
+    for callers that score interests another way.
+    """
+
+    def __init__(self, profiles: List[Dict], vocabulary: Dict[str, int], location_ids: Dict[str, int],
+                 locations: List[LocationKeys], interests: bool = True):
+        self.size = len(profiles)
+        self.vocabulary_size = len(vocabulary)
+        self.ages = []
+        self.category_masks = []
+        self.interest_bits = []
+        self.location_ids = []
+        self.locations = locations
+        rows, columns = [], []
+
+        for row, profile in enumerate(profiles):
+            category_mask = 0
+            bits = 0
+            for interest in profile.get('interests', []) if interests else ():
+                category_mask |= interest_mask(interest)
+                index = vocabulary.get(interest)
+                if index is not None and not bits >> index & 1:
+                    bits |= 1 << index
+                    rows.append(row)
+                    columns.append(index)
+
+            location = profile.get('location', '')
+            location_id = location_ids.get(location)
+            if location_id is None:
+                location_id = location_ids[location] = len(locations)
+                locations.append(location_keys(location))
+
+            self.ages.append(profile.get('age', 25))
+            self.category_masks.append(category_mask)
+            self.interest_bits.append(bits)
+            self.location_ids.append(location_id)
+
+        if np is not None:
+            self.ages = np.asarray(self.ages, dtype=np.float64)
+            self.category_masks = np.asarray(self.category_masks, dtype=np.int64)
+            self.location_ids = np.asarray(self.location_ids, dtype=np.int64)
+            self.interest_rows = np.asarray(rows, dtype=np.int64)
+            self.interest_columns = np.asarray(columns, dtype=np.int64)
+
+
+def _build_vocabulary(profiles: List[Dict]) -> Dict[str, int]:
+    # Only interests on the seeker side can ever produce a direct match, so
+    # the vocabulary stays as small as the query rather than the pool.
+    vocabulary = {}
+    for profile in profiles:
+        for interest in profile.get('interests', []):
+            vocabulary.setdefault(interest, len(vocabulary))
+    return vocabulary
+
+
+def encode_pair_sides(seekers: List[Dict], candidates: List[Dict],
+                      interests: bool = True) -> Tuple[EncodedProfiles, EncodedProfiles]:
+    vocabulary = _build_vocabulary(seekers) if interests else {}
+    location_ids: Dict[str, int] = {}
+    locations: List[LocationKeys] = []
+    return (
+        EncodedProfiles(seekers, vocabulary, location_ids, locations, interests),
+        EncodedProfiles(candidates, vocabulary, location_ids, locations, interests),
+    )
+
+
+def _location_table(a: EncodedProfiles, b: EncodedProfiles) -> Dict[Tuple[int, int], float]:
+    # Location scores only depend on the pair of distinct locations, of
+    # which there are far fewer than profile pairs.
+    return {
+        (i, j): location_score(a.locations[i], b.locations[j])
+        for i in set(a.location_ids) for j in set(b.location_ids)
+    }
+
+
+def _popcount(values):
+    counts = np.zeros(values.shape, dtype=np.int64)
+    while values.any():
+        counts += values & 1
+        values = values >> 1
+    return counts
+
+
+def _age_scores(age_diff):
+    return np.select(
+        [age_diff <= 2, age_diff <= 5, age_diff <= 10],
+        [1.0, 0.8, 0.6 - (age_diff - 5) * 0.08],
+        np.maximum(0.2, 0.4 - (age_diff - 10) * 0.02),
+    )
+
+
+def _direct_matches(a: EncodedProfiles, b: EncodedProfiles, rows: slice):
+    # Shared interests of seekers ``rows`` with every candidate. The seekers'
+    # incidence is dense but only as wide as their own vocabulary; each
+    # candidate entry that one of them also lists adds one to that pair
+    start, stop = rows.indices(a.size)[:2]
+    selected = (a.interest_rows >= start) & (a.interest_rows < stop)
+    seekers = np.zeros((stop - start, a.vocabulary_size), dtype=bool)
+    seekers[a.interest_rows[selected] - start, a.interest_columns[selected]] = True
+    seeker_index, entry = np.nonzero(seekers[:, b.interest_columns])
+    pairs = seeker_index * b.size + b.interest_rows[entry]
+    return np.bincount(pairs, minlength=(stop - start) * b.size).reshape(stop - start, b.size)
+
+
+def _vector_component_scores(a: EncodedProfiles, b: EncodedProfiles, interest_scores=None,
+                             rows: slice = slice(None)):
+    age_scores = _age_scores(np.abs(a.ages[rows, None] - b.ages[None, :]))
+
+    if interest_scores is None:
+        direct = _direct_matches(a, b, rows)
+        common = _popcount(a.category_masks[rows, None] & b.category_masks[None, :])
+        total = _popcount(a.category_masks[rows, None] | b.category_masks[None, :])
+        interest_scores = np.divide(
+            (direct * 2 + common).astype(np.float64), total,
+            out=np.zeros(total.shape, dtype=np.float64), where=total > 0,
+        )
+    else:
+        interest_scores = interest_scores[rows]
+
+    seeker_locations, row_index = np.unique(a.location_ids[rows], return_inverse=True)
+    columns, column_index = np.unique(b.location_ids, return_inverse=True)
+    table = np.array([
+        [location_score(a.locations[i], b.locations[j]) for j in columns]
+        for i in seeker_locations
+    ], dtype=np.float64)
+    location_scores = table[row_index.reshape(-1)[:, None], column_index.reshape(-1)[None, :]]
+    return age_scores, interest_scores, location_scores
+
+
+def age_score(age_diff) -> float:
+    """Age compatibility score for an age difference, as in ``analyze_age_compatibility``"""
+    if age_diff <= 2:
+        return 1.0
+    if age_diff <= 5:
+        return 0.8
+    if age_diff <= 10:
+        return 0.6 - (age_diff - 5) * 0.08
+    return max(0.2, 0.4 - (age_diff - 10) * 0.02)
+
+
+def _scalar_pair_score(a: EncodedProfiles, i: int, b: EncodedProfiles, j: int,
+                       locations: Dict[Tuple[int, int], float], interest_scores=None) -> float:
+    age = age_score(abs(a.ages[i] - b.ages[j]))
+
+    total = popcount(a.category_masks[i] | b.category_masks[j])
+    if interest_scores is not None:
+        interest_score = interest_scores[i][j]
+    elif total:
+        direct = popcount(a.interest_bits[i] & b.interest_bits[j])
+        common = popcount(a.category_masks[i] & b.category_masks[j])
+        interest_score = (direct * 2 + common) / total
+    else:
+        interest_score = 0
+
+    location = locations[a.location_ids[i], b.location_ids[j]]
+    return combine_scores(age, interest_score, location)
+
+
+def combine_scores(age, interest, location):
+    """Weighted final score (before clipping) from the three factor scores"""
+    return (
+        age * AGE_WEIGHT * 100 +
+        interest * INTEREST_WEIGHT * 100 +
+        location * LOCATION_WEIGHT * 100
+    )
+
+
+def _scores(seekers: List[Dict], candidates: List[Dict], semantic: bool = False):
+    a, b = encode_pair_sides(seekers, candidates, interests=not semantic)
+    if not a.size or not b.size:
+        return [[] for _ in range(a.size)]
+
+    interest_scores = None
+    if semantic:
+        from .semantic import default_embedder
+        interest_scores = default_embedder().similarity_matrix(
+            [profile.get('interests', []) for profile in seekers],
+            [profile.get('interests', []) for profile in candidates],
+        )
+
+    if np is not None:
+        # Seekers go through in blocks, so the per-pair intermediates stay
+        # around _BLOCK_PAIRS elements however many seekers are asked for
+        scores = np.empty((a.size, b.size), dtype=np.float64)
+        step = max(1, _BLOCK_PAIRS // b.size)
+        for start in range(0, a.size, step):
+            rows = slice(start, start + step)
+            scores[rows] = np.clip(combine_scores(*_vector_component_scores(a, b, interest_scores, rows)), 0, 100)
+        return scores
+
+    locations = _location_table(a, b)
+    return [
+        [max(0, min(100, _scalar_pair_score(a, i, b, j, locations, interest_scores))) for j in range(b.size)]
+        for i in range(a.size)
+    ]
+
+
+def score_matrix(seekers: List[Dict], candidates: List[Dict], semantic: bool = False) -> List[List[float]]:
+    """
+    Score every seeker against every candidate.
+
+    Returns an ``len(seekers) x len(candidates)`` matrix of the same final
+    scores ``score_profiles`` would produce pair by pair (``SEMANTIC_PIPELINE``
+    with ``semantic``).
+    """
+    scores = _scores(seekers, candidates, semantic)
+    return scores.tolist() if np is not None and not isinstance(scores, list) else scores
+
+
+def _ranked(scores, candidates: List[Dict], top_k: Optional[int]) -> List[Dict[str, Any]]:
+    if np is not None:
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+    else:
+        order = sorted(range(len(scores)), key=lambda j: -scores[j])
+    if top_k is not None:
+        order = order[:top_k]
+    scores = [float(scores[j]) for j in order]
+
+    matches = []
+    for j, score in zip(order, scores):
+        j = int(j)
+        match = {"index": j, "score": score}
+        if 'id' in candidates[j]:
+            match["id"] = candidates[j]['id']
+        matches.append(match)
+    return matches
+
+
+def rank_candidates(seeker: Dict, candidates: List[Dict], top_k: Optional[int] = None,
+                    max_distance_km: Optional[float] = None, semantic: bool = False) -> List[Dict[str, Any]]:
+    """
+    Rank ``candidates`` for one seeker, best match first.
+
+    With ``max_distance_km`` only candidates within that distance of the
+    seeker are ranked (see ``geo.within_radius``); ``index`` still refers to
+    the position in ``candidates``. With ``semantic`` interests are compared
+    by embedding similarity (see ``matcher.semantic``).
+    """
+    if max_distance_km is None:
+        return _ranked(_scores([seeker], candidates, semantic)[0], candidates, top_k)
+
+    origin = location_keys(seeker.get('location', ''))
+    positions = [
+        j for j, candidate in enumerate(candidates)
+        if within_radius(origin, location_keys(candidate.get('location', '')), max_distance_km)
+    ]
+    nearby = [candidates[j] for j in positions]
+    matches = _ranked(_scores([seeker], nearby, semantic)[0], nearby, top_k)
+    for match in matches:
+        match["index"] = positions[match["index"]]
+    return matches
+
+
+def rank_matrix(seekers: List[Dict], candidates: List[Dict], top_k: Optional[int] = None,
+                semantic: bool = False) -> List[List[Dict[str, Any]]]:
+    """Rank ``candidates`` for every seeker, best match first"""
+    return [_ranked(row, candidates, top_k) for row in _scores(seekers, candidates, semantic)]
+
+
+def iter_scores(seeker: Dict, candidates: List[Dict], chunk_size: int = 1024,
+                min_score: Optional[float] = None, semantic: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yield ``{"index", "score"}`` for each candidate in input order.
+
+    Candidates are scored ``chunk_size`` at a time, so the first results are
+    available immediately and working memory does not grow with the pool.
+    Matches below ``min_score`` are skipped.
+    """
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        for offset, score in enumerate(_scores([seeker], chunk, semantic)[0]):
+            score = float(score)
+            if min_score is not None and score < min_score:
+                continue
+            match = {"index": start + offset, "score": score}
+            if 'id' in chunk[offset]:
+                match["id"] = chunk[offset]['id']
+            yield match
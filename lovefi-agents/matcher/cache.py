@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from .scoring import score_profiles
+
+
+def profile_fingerprint(profile: Dict) -> list:
+    """The scoring-relevant fields of a profile in canonical form"""
+    return [
+        profile.get('age', 25),
+        sorted(set(profile.get('interests', []))),
+        profile.get('location', '').lower().strip(),
+    ]
+
+
+def pair_key(profile1: Dict, profile2: Dict) -> str:
+    """Order-independent hash of two profiles, so (A, B) and (B, A) share an entry"""
+    pair = sorted(json.dumps(profile_fingerprint(p), separators=(',', ':')) for p in (profile1, profile2))
+    return hashlib.blake2b('\n'.join(pair).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU store with an optional TTL in seconds"""
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        expires = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """
+    On-disk store that several worker processes can share.
+
+    Entries are kept as JSON with a last-access timestamp; when the table
+    grows past ``maxsize`` the least recently used rows are trimmed.
+    """
+
+    def __init__(self, path: str, maxsize: int = 100000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._writes = 0
+        self._path = path
+        self._connect()
+        # A connection must not be used on both sides of a fork: give every
+        # forked server worker its own
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._connect)
+
+    def _connect(self):
+        # Keep (but never use) an inherited connection: closing it in the
+        # child could release state the parent still relies on
+        self._inherited = getattr(self, "_conn", None)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_accessed ON scores (accessed)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM scores WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM scores WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE scores SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+        expires = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scores (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires, now),
+            )
+            self._writes += 1
+            # Trimming needs a COUNT, so only check every so often
+            if self._writes % 256 == 0:
+                self._trim()
+
+    def _trim(self):
+        excess = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0] - self.maxsize
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM scores")
+
+
+class ScoreCache:
+    """
+    Memoizes pairwise scoring results keyed on ``pair_key``.
+
+    Scoring is symmetric in the two profiles, down to the order of listed
+    interests and the wording of reasons, so a result computed for (A, B)
+    is served for (B, A) as well. Cached payloads are shared between
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, backend=None, compute: Callable[[Dict, Dict], Dict] = score_profiles):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.compute = compute
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, profile1: Dict, profile2: Dict) -> Dict:
+        key = pair_key(profile1, profile2)
+        value = self.backend.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = self.compute(profile1, profile2)
+        self.backend.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.backend),
+        }
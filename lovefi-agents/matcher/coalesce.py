@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import json
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Union
+
+
+def payload_key(payload: Union[str, bytes, Dict]) -> str:
+    """
+    Digest identifying a request payload.
+
+    Encoded payloads (the base64 string of an envelope) are hashed as sent;
+    decoded ones are serialized with sorted keys first, so key order does not
+    matter.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    elif not isinstance(payload, bytes):
+        payload = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical computations on one event loop.
+
+    The first caller for a key starts the computation; callers arriving
+    while it is still running await the same task and share its result (or
+    exception). Nothing is kept once it finishes, so this is not a cache.
+    Shared results must be treated as read-only.
+
+    A caller that is cancelled (say, its client disconnected) stops
+    waiting without cancelling the computation the others are awaiting.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    @property
+    def rate(self) -> float:
+        """Fraction of calls that joined a computation already in flight"""
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    async def run(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Await ``fn(*args)``, or the in-flight computation for ``key`` if there is one"""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finish, key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
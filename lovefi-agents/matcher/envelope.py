@@ -0,0 +1,44 @@
+import base64
+import json
+from typing import Any, Dict
+
+try:
+    import orjson
+except ImportError:
+    # Fallback to the standard library if orjson is not available
+    orjson = None
+
+AGENT_ADDRESS = "agent1qlovefi..."  # Your agent address
+
+# Raised by ``loads`` on malformed JSON (json also raises UnicodeDecodeError
+# for bytes that are not UTF-8; both are ValueErrors)
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    loads = orjson.loads
+    DecodeError = orjson.JSONDecodeError
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+    JSON_BACKEND = "json"
+    loads = json.loads
+    DecodeError = ValueError
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def encode_envelope(body: Dict, response_payload: Dict, schema_digest: str) -> bytes:
+    """Serialize a response envelope addressed back to the sender of ``body``"""
+    return dumps({
+        "version": 1,
+        "sender": AGENT_ADDRESS,
+        "target": body.get('sender', ''),
+        "session": body.get('session', ''),
+        "schema_digest": schema_digest,
+        "protocol_digest": None,
+        "payload": base64.b64encode(dumps(response_payload)).decode('ascii'),
+        "expires": body.get('expires', 0),
+        "nonce": body.get('nonce', 0),
+        "signature": None
+    })
@@ -0,0 +1,282 @@
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Keyword tables used when a location is not in the gazetteer
+MAJOR_CITIES = ['new york', 'los angeles', 'chicago', 'houston', 'phoenix', 'philadelphia']
+STATES = ['california', 'texas', 'florida', 'new york', 'illinois']
+
+# (max distance in km, score, match type) for two recognised cities
+DISTANCE_BANDS = (
+    (40.0, 0.8, 'same_city'),
+    (150.0, 0.6, 'nearby'),
+)
+
+
+class Place(NamedTuple):
+    name: str
+    region: str
+    country: str
+    lat: float
+    lon: float
+    kind: str  # 'city' or 'region'
+
+
+class LocationKeys(NamedTuple):
+    """Everything location scoring needs from one free-text location string"""
+    clean: str
+    place: Optional[Place]
+    city_mask: int
+    state_mask: int
+
+
+def _norm(text: str) -> str:
+    return ' '.join(text.lower().split()).strip(' ,.')
+
+
+class Gazetteer:
+    """
+    Offline place lookup loaded from a bundled CSV.
+
+    Cities and regions (US states, provinces, countries) are indexed by name
+    and alias. Short aliases such as state abbreviations are only honoured
+    as a whole location or a comma-separated qualifier, never when scanning
+    free text, so "living in chicago" does not resolve to Indiana.
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.cities: Dict[str, List[Place]] = {}
+        self.regions: Dict[str, Place] = {}
+        self.regions_by_id: Dict[str, Place] = {}
+
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                place = Place(row['name'], row['region'], row['country'],
+                              float(row['lat']), float(row['lon']), row['kind'])
+                names = [row['name']] + [a for a in row['aliases'].split('|') if a]
+                for name in names:
+                    key = _norm(name)
+                    if place.kind == 'city':
+                        self.cities.setdefault(key, []).append(place)
+                    else:
+                        self.regions.setdefault(key, place)
+                if place.kind == 'region':
+                    self.regions_by_id[place.region] = place
+
+        # Free-text scanners are compiled on first use: most locations
+        # resolve by exact name, and compiling them costs a cold start.
+        self._city_scan = self._region_scan = None
+        self._scanners_ready = False
+
+    def compile_scanners(self):
+        self._city_scan = self._scanner(self.cities)
+        self._region_scan = self._scanner(self.regions)
+        self._scanners_ready = True
+
+    @staticmethod
+    def _scanner(table: Dict) -> Optional['re.Pattern']:
+        names = sorted((name for name in table if len(name) >= 4), key=len, reverse=True)
+        if not names:
+            return None
+        return re.compile(r'\b(' + '|'.join(re.escape(name) for name in names) + r')\b')
+
+    @staticmethod
+    def _pick_city(candidates: List[Place], region: Optional[Place]) -> Place:
+        if region is not None:
+            for place in candidates:
+                if region.region in (place.region, place.country):
+                    return place
+        # Gazetteer rows are ordered by prominence
+        return candidates[0]
+
+    def lookup(self, location: str) -> Optional[Place]:
+        """Best gazetteer match for a free-text location, or None"""
+        clean = _norm(location)
+        if not clean:
+            return None
+        if clean in self.cities:
+            return self.cities[clean][0]
+        if clean in self.regions:
+            return self.regions[clean]
+
+        # "City, State" / "City, Country": later parts disambiguate the city
+        parts = [part.strip() for part in clean.split(',') if part.strip()]
+        head, qualifiers = parts[0], parts[1:]
+        region = next((self.regions[q] for q in qualifiers if q in self.regions), None)
+        if head in self.cities:
+            return self._pick_city(self.cities[head], region)
+        if head in self.regions:
+            return self.regions[head]
+
+        # Free text such as "downtown chicago": scan for long names only
+        if not self._scanners_ready:
+            self.compile_scanners()
+        if region is None and self._region_scan is not None:
+            match = self._region_scan.search(clean)
+            if match:
+                region = self.regions[match.group(1)]
+        if self._city_scan is not None:
+            match = self._city_scan.search(clean)
+            if match:
+                return self._pick_city(self.cities[match.group(1)], region)
+        return region
+
+    def region_name(self, region_id: str) -> str:
+        place = self.regions_by_id.get(region_id)
+        return place.name if place is not None else region_id
+
+
+GAZETTEER = Gazetteer()
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+@lru_cache(maxsize=65536)
+def location_keys(location: str) -> LocationKeys:
+    """Normalize a free-text location once: cleaned text, gazetteer place and legacy masks"""
+    clean = location.lower().strip()
+    city_mask = 0
+    for bit, city in enumerate(MAJOR_CITIES):
+        if city in clean:
+            city_mask |= 1 << bit
+    state_mask = 0
+    for bit, state in enumerate(STATES):
+        if state in clean:
+            state_mask |= 1 << bit
+    return LocationKeys(clean, GAZETTEER.lookup(location), city_mask, state_mask)
+
+
+def distance_km(keys1: LocationKeys, keys2: LocationKeys) -> Optional[float]:
+    """Distance between two recognised cities, or None if either is unknown or region-level"""
+    p1, p2 = keys1.place, keys2.place
+    if p1 is None or p2 is None or p1.kind != 'city' or p2.kind != 'city':
+        return None
+    return haversine_km(p1.lat, p1.lon, p2.lat, p2.lon)
+
+
+def compare_locations(keys1: LocationKeys, keys2: LocationKeys) -> Tuple[float, str, str]:
+    """``(score, match_type, reason)`` for two normalized locations"""
+    if keys1.clean == keys2.clean:
+        return 1.0, 'exact', 'Same location - easy to meet'
+
+    p1, p2 = keys1.place, keys2.place
+    if p1 is not None and p2 is not None:
+        distance = distance_km(keys1, keys2)
+        if distance is not None:
+            for limit, score, match_type in DISTANCE_BANDS:
+                if distance <= limit:
+                    if match_type == 'same_city':
+                        # Named in a fixed order, so the result is the same either way round
+                        area = p1.name if p1.name == p2.name else ' / '.join(sorted((p1.name, p2.name)))
+                        return score, match_type, f'Same metropolitan area ({area}) - manageable distance'
+                    return score, match_type, f'Nearby ({distance:.0f} km apart) - easy to visit'
+        if p1.region == p2.region:
+            # Countries without subdivisions in the gazetteer act as their own region
+            area = 'country' if p1.region == p1.country else 'state'
+            return 0.4, 'same_state', f'Same {area} ({GAZETTEER.region_name(p1.region)}) - possible for long-distance'
+        return 0.1, 'different', 'Different regions - long-distance challenges'
+
+    # At least one side is not in the gazetteer: fall back to keyword matching
+    common_cities = keys1.city_mask & keys2.city_mask
+    if common_cities:
+        city = MAJOR_CITIES[(common_cities & -common_cities).bit_length() - 1]
+        return 0.8, 'same_city', f'Same metropolitan area ({city}) - manageable distance'
+    common_states = keys1.state_mask & keys2.state_mask
+    if common_states:
+        state = STATES[(common_states & -common_states).bit_length() - 1]
+        return 0.4, 'same_state', f'Same state ({state}) - possible for long-distance'
+    return 0.1, 'different', 'Different regions - long-distance challenges'
+
+
+def within_radius(origin: LocationKeys, keys: LocationKeys, radius_km: float) -> bool:
+    """
+    True if ``keys`` lies within ``radius_km`` of ``origin``.
+
+    Only city-level places have coordinates, so anything else is out of
+    range unless it is literally the same location as the origin.
+    """
+    if origin.clean == keys.clean:
+        return True
+    distance = distance_km(origin, keys)
+    return distance is not None and distance <= radius_km
+
+
+def location_score(keys1: LocationKeys, keys2: LocationKeys) -> float:
+    """Location compatibility score for two ``location_keys`` results"""
+    return compare_locations(keys1, keys2)[0]
+
+
+class GeoGrid:
+    """
+    Uniform latitude/longitude grid for radius queries.
+
+    Items are filed under the cell containing their coordinates; a radius
+    query only inspects cells overlapping the query's bounding box, then
+    filters by exact great-circle distance.
+    """
+
+    def __init__(self, cell_degrees: float = 1.0):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Tuple[int, int], Dict] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def add(self, item, lat: float, lon: float):
+        self._cells.setdefault(self._cell(lat, lon), {})[item] = (lat, lon)
+
+    def discard(self, item, lat: float, lon: float):
+        cell = self._cell(lat, lon)
+        items = self._cells.get(cell)
+        if items is not None:
+            items.pop(item, None)
+            if not items:
+                del self._cells[cell]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Set:
+        """Items no more than ``radius_km`` from ``(lat, lon)``"""
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        coslat = math.cos(math.radians(lat))
+        # Widest longitude offset of the circle; near the poles it spans everything
+        if angle >= math.pi / 2 or math.sin(angle) >= coslat:
+            dlon = 180.0
+        else:
+            dlon = math.degrees(math.asin(math.sin(angle) / coslat))
+        lat_lo, lon_lo = self._cell(lat - dlat, lon - dlon)
+        lat_hi, lon_hi = self._cell(lat + dlat, lon + dlon)
+
+        found = set()
+        if lon - dlon < -180 or lon + dlon > 180:
+            # The box crosses the antimeridian: filter cells by latitude only
+            for (cell_lat, _), items in self._cells.items():
+                if lat_lo <= cell_lat <= lat_hi:
+                    self._collect(items, lat, lon, radius_km, found)
+            return found
+        for cell_lat in range(lat_lo, lat_hi + 1):
+            for cell_lon in range(lon_lo, lon_hi + 1):
+                items = self._cells.get((cell_lat, cell_lon))
+                if items:
+                    self._collect(items, lat, lon, radius_km, found)
+        return found
+
+    @staticmethod
+    def _collect(items: Dict, lat: float, lon: float, radius_km: float, found: Set):
+        for item, (item_lat, item_lon) in items.items():
+            if haversine_km(lat, lon, item_lat, item_lon) <= radius_km:
+                found.add(item)
@@ -0,0 +1,213 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from .batch import age_score, combine_scores
+from .geo import LocationKeys, location_keys, location_score
+from .index import CandidateIndex
+from .scoring import interest_mask
+from .taxonomy import popcount
+
+# Which cached pair components depend on which profile fields
+_DEPENDS = {
+    'age': ('age',),
+    'interests': ('interests',),
+    'location': ('location',),
+}
+
+
+class ProfileFeatures:
+    """Precomputed scoring inputs of one profile"""
+
+    __slots__ = ('age', 'age_band', 'interests', 'category_mask', 'location')
+
+    def __init__(self):
+        self.age = 25
+        self.age_band = 0
+        self.interests = frozenset()
+        self.category_mask = 0
+        self.location: Optional[LocationKeys] = None
+
+    def refresh(self, profile: Dict, fields, age_band: int):
+        """Recompute the features derived from ``fields`` of ``profile``"""
+        if 'age' in fields:
+            self.age = profile.get('age', 25)
+            self.age_band = math.floor(self.age / age_band)
+        if 'interests' in fields:
+            self.interests = frozenset(profile.get('interests', []))
+            mask = 0
+            for interest in self.interests:
+                mask |= interest_mask(interest)
+            self.category_mask = mask
+        if 'location' in fields:
+            self.location = location_keys(profile.get('location', ''))
+
+
+def _interest_component(a: ProfileFeatures, b: ProfileFeatures) -> float:
+    total = popcount(a.category_mask | b.category_mask)
+    if not total:
+        return 0
+    return (len(a.interests & b.interests) * 2 + popcount(a.category_mask & b.category_mask)) / total
+
+
+_COMPONENTS = {
+    'age': lambda a, b: age_score(abs(a.age - b.age)),
+    'interests': _interest_component,
+    'location': lambda a, b: location_score(a.location, b.location),
+}
+
+
+def _final(components: Dict[str, float]) -> float:
+    return max(0, min(100, combine_scores(components['age'], components['interests'], components['location'])))
+
+
+class IncrementalScorer:
+    """
+    Keeps scores up to date as individual profiles change.
+
+    Every profile's scoring features (category mask, normalized location,
+    age band) are computed once and cached. Tracked pairs keep their three
+    component scores, and watched seekers keep their top-K list. When
+    ``apply_delta`` changes a profile, only the features derived from the
+    changed fields are recomputed, only the matching components of that
+    profile's tracked pairs are re-scored, and only top-K lists the profile
+    can enter or leave are refreshed from the ``CandidateIndex``.
+    """
+
+    def __init__(self, age_band: int = 5):
+        self.age_band = age_band
+        self.index = CandidateIndex(age_band)
+        self._profiles: Dict[Any, Dict] = {}
+        self._features: Dict[Any, ProfileFeatures] = {}
+        # id -> {other id -> component scores}, stored under both ids
+        self._pairs: Dict[Any, Dict[Any, Dict[str, float]]] = {}
+        # seeker id -> (k, matches)
+        self._watched: Dict[Any, Tuple[int, List[Dict[str, Any]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, profile_id) -> bool:
+        return profile_id in self._profiles
+
+    def profile(self, profile_id) -> Dict:
+        return self._profiles[profile_id]
+
+    def add(self, profile: Dict):
+        """
+        Insert or fully replace a profile, which must carry an ``id``.
+
+        Fields missing from a replacement are dropped, not kept from the
+        stored version; its tracked pairs and watchers are updated as by
+        ``apply_delta``.
+        """
+        profile_id = profile['id']
+        profile = dict(profile)
+        if profile_id in self._profiles:
+            self._replace(profile_id, profile)
+            return
+        features = ProfileFeatures()
+        features.refresh(profile, _DEPENDS, self.age_band)
+        self._profiles[profile_id] = profile
+        self._features[profile_id] = features
+        self.index.add(profile)
+        self._refresh_watchers(profile_id)
+
+    def remove(self, profile_id) -> bool:
+        if self._profiles.pop(profile_id, None) is None:
+            return False
+        del self._features[profile_id]
+        self.index.remove(profile_id)
+        for other in self._pairs.pop(profile_id, {}):
+            del self._pairs[other][profile_id]
+        self._watched.pop(profile_id, None)
+        for seeker_id, (k, matches) in self._watched.items():
+            if any(match['id'] == profile_id for match in matches):
+                self._watched[seeker_id] = (k, self.index.top_k(self._profiles[seeker_id], k))
+        return True
+
+    def score(self, id1, id2) -> float:
+        """Score a pair and keep it tracked for ``apply_delta``"""
+        components = self._pairs.get(id1, {}).get(id2)
+        if components is None:
+            a, b = self._features[id1], self._features[id2]
+            components = {name: fn(a, b) for name, fn in _COMPONENTS.items()}
+            self._pairs.setdefault(id1, {})[id2] = components
+            self._pairs.setdefault(id2, {})[id1] = components
+        return _final(components)
+
+    def untrack(self, id1, id2):
+        self._pairs.get(id1, {}).pop(id2, None)
+        self._pairs.get(id2, {}).pop(id1, None)
+
+    def watch(self, seeker_id, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-K matches for a stored profile, kept current from now on"""
+        matches = self.index.top_k(self._profiles[seeker_id], k)
+        self._watched[seeker_id] = (k, matches)
+        return matches
+
+    def unwatch(self, seeker_id):
+        self._watched.pop(seeker_id, None)
+
+    def top_k(self, seeker_id) -> List[Dict[str, Any]]:
+        """Current top-K list of a watched seeker"""
+        return self._watched[seeker_id][1]
+
+    def apply_delta(self, profile_id, changes: Dict, threshold: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Merge ``changes`` into a stored profile and re-score what it affects.
+
+        Returns ``{"pair", "old", "new"}`` for every tracked pair whose
+        score moved by more than ``threshold``.
+        """
+        return self._replace(profile_id, {**self._profiles[profile_id], **changes}, threshold)
+
+    def _replace(self, profile_id, profile: Dict, threshold: float = 0.0) -> List[Dict[str, Any]]:
+        stored = self._profiles[profile_id]
+        dirty = {field for field in _DEPENDS if stored.get(field) != profile.get(field)}
+        # Updated in place: callers may hold the dict ``profile()`` returned
+        stored.clear()
+        stored.update(profile)
+        profile = stored
+        if not dirty:
+            return []
+
+        self._features[profile_id].refresh(profile, dirty, self.age_band)
+        self.index.add(profile)
+
+        stale = [name for field in dirty for name in _DEPENDS[field]]
+        features = self._features[profile_id]
+        changed = []
+        for other, components in self._pairs.get(profile_id, {}).items():
+            old = _final(components)
+            for name in stale:
+                components[name] = _COMPONENTS[name](features, self._features[other])
+            new = _final(components)
+            if abs(new - old) > threshold:
+                changed.append({"pair": (profile_id, other), "old": old, "new": new})
+
+        self._refresh_watchers(profile_id)
+        return changed
+
+    def _refresh_watchers(self, profile_id):
+        profile = self._profiles[profile_id]
+        features = self._features[profile_id]
+        sequence = self.index.sequence
+        rank = sequence(profile_id)
+        for seeker_id, (k, matches) in self._watched.items():
+            if seeker_id == profile_id:
+                self._watched[seeker_id] = (k, self.index.top_k(profile, k))
+                continue
+            seeker = self._features[seeker_id]
+            score = _final({name: fn(seeker, features) for name, fn in _COMPONENTS.items()})
+            others = [match for match in matches if match['id'] != profile_id]
+            if len(others) < len(matches):
+                # A profile that fell may now trail someone off the list
+                if score < next(match['score'] for match in matches if match['id'] == profile_id):
+                    self._watched[seeker_id] = (k, self.index.top_k(self._profiles[seeker_id], k))
+                    continue
+            elif len(matches) == k and (score, -rank) < (matches[-1]['score'], -sequence(matches[-1]['id'])):
+                continue
+            # Nobody else moved, so the new list follows from the old one
+            others.append({"id": profile_id, "score": score})
+            others.sort(key=lambda match: (-match['score'], sequence(match['id'])))
+            self._watched[seeker_id] = (k, others[:k])
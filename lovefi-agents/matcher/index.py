@@ -0,0 +1,259 @@
+import heapq
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+from .batch import age_score, combine_scores
+from .geo import GeoGrid, LocationKeys, location_keys, location_score
+from .scoring import interest_mask
+from .taxonomy import popcount
+
+
+class _Bucket:
+    __slots__ = ('location', 'band', 'mask', 'serial', 'members', 'max_interests', 'interest_counts',
+                 'first_sequence')
+
+    def __init__(self, location: LocationKeys, band: int, mask: int, serial: int):
+        self.location = location
+        self.band = band
+        self.mask = mask
+        # Unique per index: orders query plans that tie on bound and first sequence
+        self.serial = serial
+        # profile id -> (insertion sequence, age, interest set)
+        self.members: Dict[Any, Tuple[int, float, frozenset]] = {}
+        self.interest_counts: Dict[str, int] = {}
+        # max_interests is not tightened on delete (a stale value is still a
+        # valid bound); first_sequence is, when its member leaves (``remove``)
+        self.max_interests = 0
+        self.first_sequence = None
+
+
+class CandidateIndex:
+    """
+    Top-K candidate retrieval over a resident pool of profiles.
+
+    Profiles are bucketed by location, age band and interest category
+    bitmask: the three inputs that fix the location score, bound the age
+    score and fix the category part of the interest score. A query computes
+    an upper bound per bucket, visits buckets best bound first and stops once
+    no remaining bucket can beat the current K-th best score, so most of the
+    pool is never scored. Results are identical to ranking the whole pool
+    with ``rank_candidates`` in order of first insertion.
+
+    Locations with coordinates are also filed in a ``GeoGrid`` so radius
+    queries only plan buckets near the seeker.
+    """
+
+    def __init__(self, age_band: int = 5):
+        self.age_band = age_band
+        self._buckets: Dict[Tuple, _Bucket] = {}
+        self._where: Dict[Any, Tuple] = {}
+        self._sequence = 0
+        self._bucket_serial = 0
+        self._grid = GeoGrid()
+        # location -> number of buckets filed under it
+        self._locations: Dict[LocationKeys, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, profile_id) -> bool:
+        return profile_id in self._where
+
+    def add(self, profile: Dict):
+        """
+        Insert ``profile`` (which must carry an ``id``), replacing any previous
+        version. A replaced profile keeps its original insertion sequence, so
+        updating it does not move it behind equal-scoring candidates.
+        """
+        profile_id = profile['id']
+        key = self._where.get(profile_id)
+        if key is None:
+            sequence = self._sequence
+            self._sequence += 1
+        else:
+            sequence = self.sequence(profile_id)
+            self.remove(profile_id)
+
+        interests = frozenset(profile.get('interests', []))
+        mask = 0
+        for interest in interests:
+            mask |= interest_mask(interest)
+        age = profile.get('age', 25)
+        location = location_keys(profile.get('location', ''))
+        key = (location, math.floor(age / self.age_band), mask)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(location, key[1], mask, self._bucket_serial)
+            self._bucket_serial += 1
+            self._track_location(location, 1)
+        bucket.members[profile_id] = (sequence, age, interests)
+        bucket.max_interests = max(bucket.max_interests, len(interests))
+        if bucket.first_sequence is None or sequence < bucket.first_sequence:
+            bucket.first_sequence = sequence
+        for interest in interests:
+            bucket.interest_counts[interest] = bucket.interest_counts.get(interest, 0) + 1
+        self._where[profile_id] = key
+
+    def remove(self, profile_id) -> bool:
+        """Delete a profile; returns False if it was not indexed"""
+        key = self._where.pop(profile_id, None)
+        if key is None:
+            return False
+        bucket = self._buckets[key]
+        sequence, _, interests = bucket.members.pop(profile_id)
+        if not bucket.members:
+            del self._buckets[key]
+            self._track_location(bucket.location, -1)
+            return True
+        if sequence == bucket.first_sequence:
+            # An updated profile keeps its early sequence wherever it moves;
+            # left behind, it would weaken this bucket's tie-break bound
+            bucket.first_sequence = min(member[0] for member in bucket.members.values())
+        for interest in interests:
+            remaining = bucket.interest_counts[interest] - 1
+            if remaining:
+                bucket.interest_counts[interest] = remaining
+            else:
+                del bucket.interest_counts[interest]
+        return True
+
+    def sequence(self, profile_id) -> int:
+        """Insertion sequence of an indexed profile: of two equal scores, the lower one ranks first"""
+        return self._buckets[self._where[profile_id]].members[profile_id][0]
+
+    def _track_location(self, location: LocationKeys, delta: int):
+        count = self._locations.get(location, 0) + delta
+        place = location.place
+        located = place is not None and place.kind == 'city'
+        if count:
+            if located and delta > 0 and count == 1:
+                self._grid.add(location, place.lat, place.lon)
+            self._locations[location] = count
+        else:
+            del self._locations[location]
+            if located:
+                self._grid.discard(location, place.lat, place.lon)
+
+    def _nearby_locations(self, origin: LocationKeys, radius_km: float) -> set:
+        # Same rule as ``geo.within_radius``: an identical location is always
+        # in range, otherwise both sides need coordinates.
+        nearby = {location for location in self._locations if location.clean == origin.clean}
+        place = origin.place
+        if place is not None and place.kind == 'city':
+            nearby |= self._grid.within(place.lat, place.lon, radius_km)
+        return nearby
+
+    def _age_upper_bound(self, age: float, band: int) -> float:
+        low = band * self.age_band
+        high = low + self.age_band
+        nearest = 0 if low <= age <= high else min(abs(age - low), abs(age - high))
+        farthest = max(abs(age - low), abs(age - high))
+        bound = age_score(nearest)
+        # The age score jumps back up just past a 10 year gap
+        if nearest <= 10 < farthest:
+            bound = max(bound, 0.4)
+        return bound
+
+    @staticmethod
+    def _interest_bound(seeker_mask: int, mask: int, direct_bound: int) -> float:
+        total = popcount(seeker_mask | mask)
+        if not total:
+            return 0
+        return (direct_bound * 2 + popcount(seeker_mask & mask)) / total
+
+    @staticmethod
+    def _beaten(worst: Tuple[float, int, Any], bound: float, first_sequence: int) -> bool:
+        # True if no member of a bucket can displace the current K-th entry
+        return bound < worst[0] or (bound == worst[0] and -first_sequence < worst[1])
+
+    def top_k(self, seeker: Dict, k: int = 10, exclude_id: Any = None,
+              max_distance_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Best ``k`` matches for ``seeker``, best first, as ``{"id", "score"}`` dicts.
+
+        ``max_distance_km`` restricts results to candidates within that
+        distance, as ``rank_candidates`` does.
+        """
+        if k <= 0:
+            return []
+        if exclude_id is None:
+            exclude_id = seeker.get('id')
+
+        seeker_interests = frozenset(seeker.get('interests', []))
+        seeker_mask = 0
+        for interest in seeker_interests:
+            seeker_mask |= interest_mask(interest)
+        seeker_age = seeker.get('age', 25)
+        seeker_location = location_keys(seeker.get('location', ''))
+        nearby = None
+        if max_distance_km is not None:
+            nearby = self._nearby_locations(seeker_location, max_distance_km)
+
+        # Bounds only depend on a bucket's location, age band and category
+        # mask, which repeat heavily across buckets, so memoize each part.
+        location_cache: Dict[Tuple, float] = {}
+        age_cache: Dict[int, float] = {}
+        interest_cache: Dict[Tuple[int, int], float] = {}
+        plans = []
+        for bucket in self._buckets.values():
+            if nearby is not None and bucket.location not in nearby:
+                continue
+            location = location_cache.get(bucket.location)
+            if location is None:
+                location = location_cache[bucket.location] = location_score(seeker_location, bucket.location)
+            age_bound = age_cache.get(bucket.band)
+            if age_bound is None:
+                age_bound = age_cache[bucket.band] = self._age_upper_bound(seeker_age, bucket.band)
+            interest_key = (bucket.mask, min(len(seeker_interests), bucket.max_interests))
+            interest_bound = interest_cache.get(interest_key)
+            if interest_bound is None:
+                interest_bound = interest_cache[interest_key] = self._interest_bound(seeker_mask, *interest_key)
+            bound = min(100, combine_scores(age_bound, interest_bound, location))
+            plans.append((-bound, bucket.first_sequence, bucket.serial, bucket, age_bound, location))
+
+        # Ties are broken by insertion order, so a bucket whose bound only
+        # equals the K-th score can still matter if it holds an older profile.
+        # Two buckets can share a first sequence, so the serial settles the
+        # order before the buckets themselves would be compared.
+        plans.sort()
+
+        # Min-heap of (score, -sequence, id): the root is the current K-th best
+        heap: List[Tuple[float, int, Any]] = []
+        for bound, first_sequence, _, bucket, age_bound, location in plans:
+            if len(heap) == k:
+                if -bound < heap[0][0]:
+                    break
+                if self._beaten(heap[0], -bound, first_sequence):
+                    continue
+                # Tighten the direct-match bound with the interests actually
+                # present in this bucket before paying to score its members.
+                shared = 0
+                for interest in seeker_interests:
+                    if interest in bucket.interest_counts:
+                        shared += 1
+                tight = combine_scores(
+                    age_bound,
+                    self._interest_bound(seeker_mask, bucket.mask, min(shared, bucket.max_interests)),
+                    location,
+                )
+                if self._beaten(heap[0], min(100, tight), first_sequence):
+                    continue
+
+            common = popcount(seeker_mask & bucket.mask)
+            total = popcount(seeker_mask | bucket.mask)
+            for profile_id, (sequence, age, interests) in bucket.members.items():
+                if profile_id == exclude_id:
+                    continue
+                if total:
+                    interest = (len(seeker_interests & interests) * 2 + common) / total
+                else:
+                    interest = 0
+                score = max(0, min(100, combine_scores(age_score(abs(seeker_age - age)), interest, location)))
+                entry = (score, -sequence, profile_id)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        return [{"id": profile_id, "score": score} for score, _, profile_id in sorted(heap, reverse=True)]
@@ -0,0 +1,309 @@
+"""
+Offline top-K materialization for the daily matches feed.
+
+Reads a JSONL profile dump (one profile with an ``id`` per line), ranks
+every user against everyone else with the same scores as
+``score_profiles`` and writes each user's best matches to a compact,
+memory-mappable file that ``MatchFile`` serves without re-scoring:
+
+    python -m matcher.materialize profiles.jsonl matches.bin --top-k 20 --workers 8
+
+File layout (little-endian, sections 8-byte aligned):
+
+    header     magic, version, top_k, users, id width, created, section positions
+    offsets    (users + 1) x u64   row i's matches are [offsets[i], offsets[i + 1])
+    ids        users x id width    UTF-8 user ids, NUL-padded, sorted by their bytes
+    neighbors  matches x u32       row number of each matched user
+    scores     matches x f32       match scores, best first within a row
+
+Rows are in sorted id order, so a lookup is a binary search over the ids
+section followed by two slices. Scores are stored as float32 (within
+1e-5 of the live score).
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .store import ProfileStore
+
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to a heap per user if numpy is not available
+    np = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LFMATCH1'
+VERSION = 1
+# magic, version, top_k, users, id width, created, ids, neighbors, scores positions
+_HEADER = struct.Struct('<8sIIQIxxxxQQQQ')
+_OFFSETS_POS = _HEADER.size
+
+# Inherited by forked workers; set by the pool initializer elsewhere
+_STORE: Optional[ProfileStore] = None
+
+
+def read_profiles(path: str) -> Iterator[Dict]:
+    """Profiles from a JSONL dump, skipping blank lines"""
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            profile = json.loads(line)
+            if not isinstance(profile, dict) or profile.get('id') is None:
+                raise ValueError(f"{path}:{number}: every profile needs an 'id'")
+            yield profile
+
+
+def build_store(profiles: Iterable[Dict]) -> ProfileStore:
+    """Load profiles in sorted id order (later duplicates win), so store rows are file rows"""
+    latest = {str(profile['id']): profile for profile in profiles}
+    store = ProfileStore()
+    for profile_id in sorted(latest, key=lambda key: key.encode('utf-8')):
+        store.add(dict(latest[profile_id], id=profile_id))
+    return store
+
+
+def _init_worker(store: ProfileStore):
+    global _STORE
+    _STORE = store
+
+
+def _top_rows(scores, row: int, k: int, min_score: Optional[float]) -> Tuple[List[int], List[float]]:
+    """Best ``k`` rows other than ``row``, ties broken by row like ``rank_candidates``"""
+    if np is None:
+        ranked = sorted((-score, other) for other, score in enumerate(scores)
+                        if other != row and (min_score is None or score >= min_score))[:k]
+        return [other for _, other in ranked], [-score for score, _ in ranked]
+
+    scores[row] = -np.inf
+    if min_score is not None:
+        scores[scores < min_score] = -np.inf
+    count = min(k, int(np.count_nonzero(scores > -np.inf)))
+    if not count:
+        return [], []
+    if count < len(scores):
+        kth = np.partition(scores, len(scores) - count)[len(scores) - count]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:count - len(above)]
+        chosen = np.concatenate([above, ties])
+    else:
+        chosen = np.arange(len(scores))
+    chosen.sort()
+    order = chosen[np.argsort(-scores[chosen], kind='stable')]
+    return order.tolist(), scores[order].tolist()
+
+
+def _rank_chunk(task: Tuple[int, int, int, Optional[float]]) -> Tuple[int, array, array, array]:
+    """Rank rows ``start:stop`` of the worker's store; returns counts, neighbors and scores"""
+    start, stop, k, min_score = task
+    store = _STORE
+    counts, neighbors, scores = array('I'), array('I'), array('f')
+    for row in range(start, stop):
+        rows, values = _top_rows(store.scores(store.profile(store.ids[row])), row, k, min_score)
+        counts.append(len(rows))
+        neighbors.extend(rows)
+        scores.extend(values)
+    return start, counts, neighbors, scores
+
+
+def materialize(store: ProfileStore, path: str, top_k: int = 20, workers: Optional[int] = None,
+                chunk_size: int = 512, min_score: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Write every user's ``top_k`` matches to ``path`` and return run statistics.
+
+    ``store`` must hold live rows only, in sorted id order (see
+    ``build_store``). Chunks of ``chunk_size`` users are ranked on
+    ``workers`` processes (default: one per CPU). The file is written next
+    to ``path`` and renamed into place, so readers never see a partial file.
+    """
+    if len(store) != len(store.ids):
+        raise ValueError("materialize needs a compacted store")
+    users = len(store)
+    ids = [str(profile_id).encode('utf-8') for profile_id in store.ids]
+    if ids != sorted(ids):
+        raise ValueError("store rows must be in sorted id order; load it with build_store")
+    width = max((len(profile_id) for profile_id in ids), default=1) or 1
+
+    workers = workers or os.cpu_count() or 1
+    if np is not None and users:
+        # Build the per-store arrays once, before any fork, so workers share them
+        store._derived_columns()
+    tasks = [(start, min(start + chunk_size, users), top_k, min_score) for start in range(0, users, chunk_size)]
+    counts, neighbors, scores = array('I'), array('I'), array('f')
+    started = time.perf_counter()
+
+    global _STORE
+    if workers == 1:
+        _STORE = store
+        results = map(_rank_chunk, tasks)
+        pool = None
+    else:
+        # Forked workers inherit the store; others are sent a copy once each
+        methods = multiprocessing.get_all_start_methods()
+        if 'fork' in methods:
+            _STORE = store
+            pool = multiprocessing.get_context('fork').Pool(workers)
+        else:
+            pool = multiprocessing.get_context().Pool(workers, initializer=_init_worker, initargs=(store,))
+        results = pool.imap(_rank_chunk, tasks)
+    try:
+        for _, chunk_counts, chunk_neighbors, chunk_scores in results:
+            counts.extend(chunk_counts)
+            neighbors.extend(chunk_neighbors)
+            scores.extend(chunk_scores)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _STORE = None
+    elapsed = time.perf_counter() - started
+
+    offsets = array('Q', [0])
+    for count in counts:
+        offsets.append(offsets[-1] + count)
+
+    ids_pos = _OFFSETS_POS + len(offsets) * 8
+    neighbors_pos = _align(ids_pos + users * width)
+    scores_pos = neighbors_pos + len(neighbors) * 4
+
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, top_k, users, width, int(time.time()),
+                             ids_pos, neighbors_pos, scores_pos))
+        _little_endian(offsets).tofile(f)
+        f.write(b''.join(profile_id.ljust(width, b'\0') for profile_id in ids))
+        f.write(b'\0' * (neighbors_pos - ids_pos - users * width))
+        _little_endian(neighbors).tofile(f)
+        _little_endian(scores).tofile(f)
+    os.replace(tmp, path)
+
+    return {
+        'users': users,
+        'matches': len(neighbors),
+        'bytes': os.path.getsize(path),
+        'seconds': elapsed,
+        'workers': workers,
+    }
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def _little_endian(values: array) -> array:
+    if struct.pack('=H', 1) == struct.pack('<H', 1):
+        return values
+    values = array(values.typecode, values)
+    values.byteswap()
+    return values
+
+
+class MatchFile:
+    """
+    Read-only view of a file written by ``materialize``.
+
+    The file is memory-mapped, so opening it is cheap and lookups touch only
+    the pages they need. ``stale`` reports whether a newer file has been
+    renamed over the path since it was opened.
+    """
+
+    def __init__(self, path: str):
+        import mmap
+
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._identity = (stat.st_ino, stat.st_mtime_ns)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.top_k, self.users, self.id_width, self.created,
+         self._ids_pos, self._neighbors_pos, self._scores_pos) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} match file")
+
+    def __len__(self) -> int:
+        return self.users
+
+    def __contains__(self, user_id) -> bool:
+        return self._row(user_id) is not None
+
+    def close(self):
+        self._map.close()
+
+    def stale(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) != self._identity
+
+    def _id(self, row: int) -> bytes:
+        start = self._ids_pos + row * self.id_width
+        return self._map[start:start + self.id_width].rstrip(b'\0')
+
+    def _row(self, user_id) -> Optional[int]:
+        key = str(user_id).encode('utf-8')
+        if len(key) > self.id_width:
+            return None
+        row = bisect_left(_IdColumn(self), key)
+        return row if row < self.users and self._id(row) == key else None
+
+    def matches(self, user_id) -> Optional[List[Dict[str, Any]]]:
+        """Precomputed ``{"id", "score"}`` matches for ``user_id``, best first, or None if unknown"""
+        row = self._row(user_id)
+        if row is None:
+            return None
+        start, stop = struct.unpack_from('<QQ', self._map, _OFFSETS_POS + row * 8)
+        count = stop - start
+        neighbors = struct.unpack_from(f'<{count}I', self._map, self._neighbors_pos + start * 4)
+        scores = struct.unpack_from(f'<{count}f', self._map, self._scores_pos + start * 4)
+        return [
+            {"id": self._id(neighbor).decode('utf-8'), "score": round(score, 4)}
+            for neighbor, score in zip(neighbors, scores)
+        ]
+
+
+class _IdColumn:
+    """Sequence view of the sorted id section, for ``bisect``"""
+
+    __slots__ = ('file',)
+
+    def __init__(self, file: MatchFile):
+        self.file = file
+
+    def __len__(self) -> int:
+        return self.file.users
+
+    def __getitem__(self, row: int) -> bytes:
+        return self.file._id(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute every user's top matches from a JSONL profile dump")
+    parser.add_argument('profiles', help='JSONL file, one profile with an "id" per line')
+    parser.add_argument('output', help='match file to write')
+    parser.add_argument('--top-k', type=int, default=20)
+    parser.add_argument('--min-score', type=float, default=None, help='drop matches scoring below this')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=512, help='users per parallel task')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    started = time.perf_counter()
+    store = build_store(read_profiles(args.profiles))
+    logger.info("Loaded %d profiles in %.1fs", len(store), time.perf_counter() - started)
+    stats = materialize(store, args.output, args.top_k, args.workers, args.chunk_size, args.min_score)
+    logger.info("Wrote %d matches for %d users to %s (%d bytes) in %.1fs on %d worker(s)",
+                stats['matches'], stats['users'], args.output, stats['bytes'], stats['seconds'], stats['workers'])
+
+
+if __name__ == "__main__":
+    main()
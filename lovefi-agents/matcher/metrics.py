@@ -0,0 +1,293 @@
+import io
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Summary:
+    """Count, sum and sliding-window quantiles of observed values"""
+
+    __slots__ = ('count', 'sum', '_samples', '_lock')
+
+    def __init__(self, window: int = 2048):
+        self.count = 0
+        self.sum = 0.0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self._samples.append(value)
+
+    def time(self) -> '_Timer':
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self)
+
+    def quantiles(self, qs=QUANTILES) -> List[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return [float('nan')] * len(qs)
+        return [samples[min(len(samples) - 1, int(q * len(samples)))] for q in qs]
+
+
+class _Timer:
+    __slots__ = ('_summary', '_start')
+
+    def __init__(self, summary: Summary):
+        self._summary = summary
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._summary.observe(time.perf_counter() - self._start)
+        return False
+
+
+def _key(name: str, labels: Dict[str, str]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value) -> str:
+    # Exact, unlike ``{:g}``, which keeps six significant digits and would
+    # round a counter past a million
+    if isinstance(value, int):
+        return str(int(value))
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+class Metrics:
+    """
+    In-process counters, summaries and gauges rendered in the Prometheus
+    text exposition format.
+    """
+
+    def __init__(self, namespace: str = 'matcher', window: int = 2048):
+        self.namespace = namespace
+        self.window = window
+        self._counters: Dict[LabelKey, float] = {}
+        self._summaries: Dict[LabelKey, Summary] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def summary(self, name: str, **labels) -> Summary:
+        key = _key(name, labels)
+        summary = self._summaries.get(key)
+        if summary is None:
+            with self._lock:
+                summary = self._summaries.setdefault(key, Summary(self.window))
+        return summary
+
+    def observe(self, name: str, value: float, **labels):
+        self.summary(name, **labels).observe(value)
+
+    def time(self, name: str, **labels) -> _Timer:
+        """Context manager observing the elapsed seconds into ``name``"""
+        return self.summary(name, **labels).time()
+
+    def gauge(self, name: str, fn: Callable[[], float], help_text: Optional[str] = None):
+        """Register a gauge whose value is read from ``fn`` at render time"""
+        self._gauges[name] = fn
+        if help_text:
+            self._help[name] = help_text
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self._counters.get(_key(name, labels), 0)
+
+    def render(self) -> str:
+        lines = []
+        prefix = f'{self.namespace}_'
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f'# HELP {prefix}{name} {self._help[name]}')
+            lines.append(f'# TYPE {prefix}{name} {kind}')
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items(), key=lambda item: item[0])
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                header(name, 'counter')
+                seen.add(name)
+            lines.append(f'{prefix}{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for (name, labels), summary in summaries:
+            if name not in seen:
+                header(name, 'summary')
+                seen.add(name)
+            for q, value in zip(QUANTILES, summary.quantiles()):
+                lines.append(f'{prefix}{name}{_format_labels(labels, (("quantile", str(q)),))} {_format_value(value)}')
+            lines.append(f'{prefix}{name}_sum{_format_labels(labels)} {_format_value(summary.sum)}')
+            lines.append(f'{prefix}{name}_count{_format_labels(labels)} {summary.count}')
+
+        for name, fn in sorted(self._gauges.items()):
+            header(name, 'gauge')
+            try:
+                lines.append(f'{prefix}{name} {_format_value(fn())}')
+            except Exception:
+                logger.exception("Gauge %s failed", name)
+
+        return '\n'.join(lines) + '\n'
+
+
+class SlowRequestProfiler:
+    """
+    Opt-in profiler for slow requests.
+
+    A ``sample_rate`` fraction of requests run under cProfile; when one of
+    them takes longer than ``threshold_ms`` its hottest functions are logged
+    and the last few reports are kept for inspection. Disabled when
+    ``threshold_ms`` is ``None``.
+    """
+
+    def __init__(self, threshold_ms: Optional[float] = None, sample_rate: float = 0.01,
+                 metrics: Optional['Metrics'] = None, keep: int = 10):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.metrics = metrics
+        self.reports: Deque[str] = deque(maxlen=keep)
+
+    @classmethod
+    def from_env(cls, metrics: Optional['Metrics'] = None) -> 'SlowRequestProfiler':
+        """Configure from ``MATCHER_PROFILE_SLOW_MS`` and ``MATCHER_PROFILE_SAMPLE_RATE``"""
+        threshold = os.environ.get('MATCHER_PROFILE_SLOW_MS')
+        return cls(
+            threshold_ms=float(threshold) if threshold else None,
+            sample_rate=float(os.environ.get('MATCHER_PROFILE_SAMPLE_RATE', '0.01')),
+            metrics=metrics,
+        )
+
+    def profile(self, label: str) -> '_ProfileScope':
+        sampled = self.threshold_ms is not None and random.random() < self.sample_rate
+        return _ProfileScope(self, label, sampled)
+
+    def _report(self, label: str, elapsed_ms: float, profiler):
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(15)
+        report = f"Slow request {label}: {elapsed_ms:.1f}ms\n{out.getvalue()}"
+        self.reports.append(report)
+        if self.metrics is not None:
+            self.metrics.inc('slow_requests_total', route=label)
+        logger.warning(report)
+
+
+class _ProfileScope:
+    __slots__ = ('_owner', '_label', '_profiler', '_start')
+
+    def __init__(self, owner: SlowRequestProfiler, label: str, sampled: bool):
+        self._owner = owner
+        self._label = label
+        if sampled:
+            # Imported on first use to keep it off the cold-start path
+            import cProfile
+            self._profiler = cProfile.Profile()
+        else:
+            self._profiler = None
+
+    def __enter__(self):
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this interpreter
+                self._profiler = None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self._start) * 1e3
+        if self._profiler is not None:
+            self._profiler.disable()
+            if elapsed_ms > self._owner.threshold_ms:
+                self._owner._report(self._label, elapsed_ms, self._profiler)
+        return False
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and a status-labelled count per route.
+
+    Paths outside ``routes`` are reported as ``other`` to keep label
+    cardinality bounded.
+    """
+
+    def __init__(self, app, metrics: Metrics, routes=()):
+        self.app = app
+        self.metrics = metrics
+        self.routes = frozenset(routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = scope['path'] if scope['path'] in self.routes else 'other'
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.observe('request_seconds', time.perf_counter() - start, route=route)
+            self.metrics.inc('requests_total', route=route, status=status)
+
+
+METRICS = Metrics()
+METRICS.describe('stage_seconds', 'Time spent in each request-handling stage')
+METRICS.describe('request_seconds', 'End-to-end request handling time by route')
+METRICS.describe('requests_total', 'Requests handled by route and HTTP status')
+METRICS.describe('errors_total', 'Requests that failed with an unhandled exception')
+METRICS.describe('busy_total', 'Requests refused with 503 because the scoring pool was full')
+METRICS.describe('rejected_total', 'Requests refused before scoring, by route and reason (too_large, invalid or bad_request)')
+METRICS.describe('pipeline_cutoffs_total', 'Pairs dropped by a scoring cutoff, by the stage they stopped before')
+METRICS.describe('slow_requests_total', 'Profiled requests slower than the configured threshold')
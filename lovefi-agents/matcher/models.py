@@ -0,0 +1,36 @@
+"""
+Message models of the uAgent protocol in ``dating_matcher.py``.
+
+The HTTP routes accept the same payload fields; ``matcher.validation``
+checks them against bounded schemas before anything is scored.
+"""
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class MatchingRequest(BaseModel):
+    profile1: Dict = {}
+    profile2: Dict = {}
+
+class MatchingResponse(BaseModel):
+    score: float
+    explanation: str
+    compatibility_factors: Dict
+    recommendations: List[str]
+
+class BatchMatchingRequest(BaseModel):
+    seeker: Dict = {}
+    candidates: List[Dict] = []
+    top_k: Optional[int] = None
+    max_distance_km: Optional[float] = None
+
+class BatchMatchingResponse(BaseModel):
+    matches: List[Dict]
+
+class MatchingBusy(BaseModel):
+    reason: str
+    retry_after: float
+
+class MatchingRejected(BaseModel):
+    reason: str
@@ -0,0 +1,402 @@
+from functools import lru_cache
+from operator import itemgetter
+from string import Formatter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from .geo import MAJOR_CITIES, compare_locations, location_keys
+from .metrics import METRICS
+from .taxonomy import KeywordMatcher, popcount
+
+# Keyword tables are built once at import time and shared by every request.
+INTEREST_CATEGORIES = {
+    'outdoor': ['hiking', 'camping', 'climbing', 'running', 'cycling', 'surfing', 'skiing'],
+    'creative': ['art', 'music', 'writing', 'photography', 'painting', 'drawing', 'crafts'],
+    'intellectual': ['reading', 'chess', 'debate', 'learning', 'philosophy', 'science'],
+    'social': ['dancing', 'parties', 'networking', 'volunteering', 'community'],
+    'culinary': ['cooking', 'baking', 'wine', 'restaurants', 'food'],
+    'fitness': ['gym', 'yoga', 'pilates', 'sports', 'martial arts', 'crossfit'],
+    'tech': ['programming', 'gaming', 'gadgets', 'ai', 'blockchain', 'coding']
+}
+
+TAXONOMY = KeywordMatcher(INTEREST_CATEGORIES)
+
+AGE_WEIGHT = 0.25
+INTEREST_WEIGHT = 0.50
+LOCATION_WEIGHT = 0.25
+
+_EXPLANATION_STAGE = METRICS.summary('stage_seconds', stage='explanation')
+_RECOMMENDATION_STAGE = METRICS.summary('stage_seconds', stage='recommendations')
+
+_FORMATTER = Formatter()
+
+
+@lru_cache(maxsize=65536)
+def interest_mask(interest: str) -> int:
+    """Category bitmask for a single interest, memoized per distinct string"""
+    return TAXONOMY.mask(interest)
+
+
+def categorize_interests(interests: List[str]) -> Dict[str, List[str]]:
+    categories = {}
+    for interest in interests:
+        for category in TAXONOMY.names(interest_mask(interest)):
+            categories.setdefault(category, []).append(interest)
+    return categories
+
+
+InterestSets = Tuple[FrozenSet[str], FrozenSet[str], int, int]
+
+
+def _interest_sets(interests1: List[str], interests2: List[str]) -> InterestSets:
+    # Both interest sets and category masks of a pair, shared by the interest
+    # bound and the analysis
+    mask1 = mask2 = 0
+    for interest in interests1:
+        mask1 |= interest_mask(interest)
+    for interest in interests2:
+        mask2 |= interest_mask(interest)
+    return frozenset(interests1), frozenset(interests2), mask1, mask2
+
+
+def _interest_score(sets: InterestSets) -> float:
+    interests1, interests2, mask1, mask2 = sets
+    total = popcount(mask1 | mask2)
+    if not total:
+        return 0
+    return (len(interests1 & interests2) * 2 + popcount(mask1 & mask2)) / total
+
+
+def _interest_analysis(sets: InterestSets) -> Dict:
+    set1, set2, mask1, mask2 = sets
+
+    # Sorted, not in either profile's order: results are cached for the
+    # pair regardless of which profile came first
+    shared = sorted(set1 & set2)
+    direct_overlap = len(shared)
+
+    return {
+        'direct_matches': direct_overlap,
+        'semantic_matches': popcount(mask1 & mask2),
+        'total_interests': len(set1) + len(set2) - direct_overlap,
+        'common_categories': sorted(TAXONOMY.names(mask1 & mask2)),
+        'shared_interests': shared,
+        'compatibility_score': _interest_score(sets)
+    }
+
+
+class CompatibilityAnalyzer:
+    @staticmethod
+    def analyze_interests(interests1: List[str], interests2: List[str]) -> Dict:
+        return _interest_analysis(_interest_sets(interests1, interests2))
+
+    @staticmethod
+    def analyze_age_compatibility(age1: int, age2: int) -> Dict:
+        age_diff = abs(age1 - age2)
+
+        if age_diff <= 2:
+            compatibility = 1.0
+            reason = "Very close in age - excellent life stage alignment"
+        elif age_diff <= 5:
+            compatibility = 0.8
+            reason = "Good age compatibility - similar life experiences"
+        elif age_diff <= 10:
+            compatibility = 0.6 - (age_diff - 5) * 0.08
+            reason = "Moderate age gap - some life stage differences"
+        else:
+            compatibility = max(0.2, 0.4 - (age_diff - 10) * 0.02)
+            reason = "Significant age gap - may have different priorities"
+
+        return {
+            'age_difference': age_diff,
+            'compatibility_score': compatibility,
+            'reason': reason,
+            'life_stage_match': compatibility > 0.7
+        }
+
+    @staticmethod
+    def analyze_location(location1: str, location2: str) -> Dict:
+        score, match_type, reason = compare_locations(location_keys(location1), location_keys(location2))
+        return {
+            'match_type': match_type,
+            'compatibility_score': score,
+            'reason': reason
+        }
+
+
+def template(text: str) -> Callable[[Dict], str]:
+    """
+    Renderer for a ``str.format`` template over an analysis dict, with
+    ``{score}`` as its ``compatibility_score`` out of 100.
+
+    The template is parsed once into a positional format string and an
+    ``itemgetter`` for its fields, so rendering is a lookup and one
+    ``format`` call rather than a re-parse and a keyword dict per line.
+    """
+    parts, keys = [], []
+    for literal, field, spec, conversion in _FORMATTER.parse(text):
+        parts.append(literal.replace('{', '{{').replace('}', '}}'))
+        if field is None:
+            continue
+        if field != 'score':
+            keys.append(field)
+            field = str(len(keys) - 1)
+        parts.append('{' + field + ('!' + conversion if conversion else '') + (':' + spec if spec else '') + '}')
+    render = ''.join(parts).format
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda analysis: render(analysis[key], score=analysis['compatibility_score'] * 100)
+    fields = itemgetter(*keys) if keys else (lambda analysis: ())
+    return lambda analysis: render(*fields(analysis), score=analysis['compatibility_score'] * 100)
+
+
+# Recommendation text keyed on the compatibility factors it depends on
+SHARED_INTERESTS_TEMPLATE = "Plan activities around shared interests: {}".format
+LIFE_STAGE_RECOMMENDATIONS = {
+    True: "Your similar life stages create great potential for shared goals",
+    False: "Embrace the different perspectives your age difference brings",
+}
+LOCATION_RECOMMENDATIONS = {
+    'exact': "Being in the same area makes meeting up easy - suggest local date spots",
+    'same_city': "Explore different neighborhoods together to bridge your local differences",
+    'nearby': "You're a short trip apart - take turns hosting dates in each other's town",
+}
+
+
+def generate_recommendations(profile1: Dict, profile2: Dict, compatibility_factors: Dict) -> List[str]:
+    recommendations = []
+
+    interest_factor = compatibility_factors['interests']
+    if interest_factor['direct_matches'] > 0:
+        common_interests = interest_factor.get('shared_interests')
+        if common_interests is None:
+            common_interests = sorted(set(profile1.get('interests', [])) & set(profile2.get('interests', [])))
+        recommendations.append(SHARED_INTERESTS_TEMPLATE(', '.join(common_interests[:3])))
+
+    recommendations.append(LIFE_STAGE_RECOMMENDATIONS[bool(compatibility_factors['age']['life_stage_match'])])
+
+    location = LOCATION_RECOMMENDATIONS.get(compatibility_factors['location']['match_type'])
+    if location is not None:
+        recommendations.append(location)
+
+    return recommendations
+
+
+class Stage(NamedTuple):
+    """
+    One factor of the compatibility score.
+
+    ``analyze(profile1, profile2)`` returns the factor's analysis dict, whose
+    ``compatibility_score`` is weighted into the final score; ``describe``
+    renders its explanation line (usually a ``template``). ``max_score`` is a
+    static upper bound on ``compatibility_score`` (``None`` if unbounded) and
+    ``upper_bound`` an optional cheap per-pair bound, both used to stop early
+    under a cutoff. Stages run cheapest ``cost`` first.
+
+    ``prepare(profile1, profile2)``, when set, computes per-pair inputs the
+    bound and the analysis share; both are then called with its result in
+    place of the two profiles, and it runs at most once per scored pair.
+    """
+    name: str
+    analyze: Callable[..., Dict]
+    describe: Callable[[Dict], str]
+    cost: int = 0
+    max_score: Optional[float] = 1.0
+    upper_bound: Optional[Callable[..., float]] = None
+    prepare: Optional[Callable[[Dict, Dict], Any]] = None
+
+
+def _interest_inputs(profile1: Dict, profile2: Dict) -> InterestSets:
+    return _interest_sets(profile1.get('interests', []), profile2.get('interests', []))
+
+
+AGE_STAGE = Stage(
+    'age',
+    lambda p1, p2: CompatibilityAnalyzer.analyze_age_compatibility(p1.get('age', 25), p2.get('age', 25)),
+    template("Age: {reason} (Score: {score:.0f}/100)"),
+    cost=0,
+)
+INTEREST_STAGE = Stage(
+    'interests',
+    _interest_analysis,
+    template("Interests: {direct_matches} direct matches, {semantic_matches} category overlaps "
+             "(Score: {score:.0f}/100)"),
+    cost=2,
+    max_score=None,
+    # The exact score, from the same sets and masks as the analysis
+    upper_bound=_interest_score,
+    prepare=_interest_inputs,
+)
+LOCATION_STAGE = Stage(
+    'location',
+    lambda p1, p2: CompatibilityAnalyzer.analyze_location(p1.get('location', ''), p2.get('location', '')),
+    template("Location: {reason} (Score: {score:.0f}/100)"),
+    cost=1,
+)
+
+DEFAULT_STAGES = (AGE_STAGE, INTEREST_STAGE, LOCATION_STAGE)
+DEFAULT_WEIGHTS = {'age': AGE_WEIGHT, 'interests': INTEREST_WEIGHT, 'location': LOCATION_WEIGHT}
+
+
+# Text fields a scoring result can carry on top of ``score`` and ``compatibility_factors``
+TEXT_FIELDS = ('explanation', 'recommendations')
+
+
+class ScoringPipeline:
+    """
+    Weighted sum of scoring stages with an optional cutoff.
+
+    The final score is ``sum(compatibility_score * weight * 100)`` over the
+    stages in declaration order, clipped to 0-100. With ``min_score`` set,
+    stages run cheapest first and the pair is dropped (``score`` returns
+    ``None``) as soon as the best score it could still reach falls short, so
+    interest analysis, the explanation and recommendations are skipped for
+    pairs that cannot make the cut.
+
+    ``include`` names the ``TEXT_FIELDS`` rendered into each result (all of
+    them by default); ``score_only`` is ``include=()``, a result carrying
+    just ``score`` and ``compatibility_factors``. ``render`` adds the text
+    to such a result later, so the structured result can be cached and the
+    text built only for callers that ask for it.
+    """
+
+    def __init__(self, stages=DEFAULT_STAGES, weights: Optional[Dict[str, float]] = None,
+                 min_score: Optional[float] = None, score_only: bool = False,
+                 recommend: Callable[[Dict, Dict, Dict], List[str]] = generate_recommendations,
+                 include: Optional[Iterable[str]] = None):
+        self.stages = tuple(stages)
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        missing = [stage.name for stage in self.stages if stage.name not in self.weights]
+        if missing:
+            raise ValueError(f"No weight for stages: {', '.join(missing)}")
+        self.include = frozenset() if score_only else frozenset(TEXT_FIELDS if include is None else include)
+        unknown = self.include.difference(TEXT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown text fields: {', '.join(sorted(unknown))}")
+        self.min_score = min_score
+        self.score_only = not self.include
+        self.recommend = recommend
+        self._order = sorted(self.stages, key=lambda stage: stage.cost)
+        self._timers = {stage.name: METRICS.summary('stage_seconds', stage=stage.name) for stage in self.stages}
+
+    def with_options(self, min_score: Optional[float] = None, score_only: bool = False,
+                     include: Optional[Iterable[str]] = None) -> 'ScoringPipeline':
+        """Same stages and weights with a different cutoff or output mode"""
+        return ScoringPipeline(self.stages, self.weights, min_score, score_only, self.recommend, include)
+
+    @staticmethod
+    def _inputs(stage: Stage, profile1: Dict, profile2: Dict, prepared: Dict[str, Any]) -> tuple:
+        # Arguments for a stage's bound and analysis; a prepared stage's
+        # inputs are kept in the per-call scratch for both
+        if stage.prepare is None:
+            return profile1, profile2
+        if stage.name not in prepared:
+            prepared[stage.name] = stage.prepare(profile1, profile2)
+        return prepared[stage.name],
+
+    def _reachable(self, analyses: Dict[str, Dict], pending, profile1: Dict, profile2: Dict,
+                   bounds: Dict[str, float], prepared: Dict[str, Any]) -> bool:
+        best = 0
+        for stage in self.stages:
+            if stage.name in analyses:
+                value = analyses[stage.name]['compatibility_score']
+            elif stage in pending:
+                if stage.upper_bound is None:
+                    value = stage.max_score
+                else:
+                    # Computed once per pair, however many cutoff checks follow
+                    value = bounds.get(stage.name)
+                    if value is None:
+                        value = bounds[stage.name] = stage.upper_bound(
+                            *self._inputs(stage, profile1, profile2, prepared))
+                if value is None:
+                    return True
+            else:
+                value = 0
+            best += value * self.weights[stage.name] * 100
+        return min(100, best) >= self.min_score
+
+    def score(self, profile1: Dict, profile2: Dict) -> Optional[Dict[str, Any]]:
+        """Score two profiles; ``None`` if they cannot reach ``min_score``"""
+        analyses: Dict[str, Dict] = {}
+        bounds: Dict[str, float] = {}
+        prepared: Dict[str, Any] = {}
+        for position, stage in enumerate(self._order):
+            if self.min_score is not None and position and \
+                    not self._reachable(analyses, self._order[position:], profile1, profile2, bounds, prepared):
+                METRICS.inc('pipeline_cutoffs_total', stage=stage.name)
+                return None
+            with self._timers[stage.name].time():
+                analyses[stage.name] = stage.analyze(*self._inputs(stage, profile1, profile2, prepared))
+
+        final_score = 0
+        for stage in self.stages:
+            final_score += analyses[stage.name]['compatibility_score'] * self.weights[stage.name] * 100
+        final_score = max(0, min(100, final_score))
+        if self.min_score is not None and final_score < self.min_score:
+            METRICS.inc('pipeline_cutoffs_total', stage='final')
+            return None
+
+        compatibility_factors = {stage.name: analyses[stage.name] for stage in self.stages}
+        compatibility_factors['overall_score'] = final_score
+        result = {"score": final_score, "compatibility_factors": compatibility_factors}
+        return self.render(profile1, profile2, result) if self.include else result
+
+    def render(self, profile1: Dict, profile2: Dict, result: Dict[str, Any],
+               include: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        A copy of ``result`` with the text fields in ``include`` (by default
+        the pipeline's own) rendered from its ``compatibility_factors``.
+        ``result`` itself is left untouched, so a cached one can be shared.
+        """
+        include = self.include if include is None else include
+        compatibility_factors = result['compatibility_factors']
+        rendered = {"score": result['score']}
+
+        if 'explanation' in include:
+            with _EXPLANATION_STAGE.time():
+                rendered['explanation'] = "Compatibility Analysis:\n" + "\n".join(
+                    f"• {stage.describe(compatibility_factors[stage.name])}" for stage in self.stages
+                )
+
+        rendered['compatibility_factors'] = compatibility_factors
+        if 'recommendations' in include:
+            with _RECOMMENDATION_STAGE.time():
+                rendered['recommendations'] = self.recommend(profile1, profile2, compatibility_factors)
+
+        return rendered
+
+
+DEFAULT_PIPELINE = ScoringPipeline()
+
+
+def score_profiles(profile1: Dict, profile2: Dict) -> Dict[str, Any]:
+    """
+    Score two profiles and build the matching response payload
+    """
+    return DEFAULT_PIPELINE.score(profile1, profile2)
+
+
+def quick_score(profile1: Dict, profile2: Dict) -> int:
+    """Simple compatibility calculation used by the lightweight endpoint"""
+    score = 50  # Base score
+
+    # Age compatibility
+    age_diff = abs(profile1.get('age', 25) - profile2.get('age', 25))
+    if age_diff <= 5:
+        score += 20
+    elif age_diff <= 10:
+        score += 10
+
+    # Interest overlap
+    common_interests = len(set(profile1.get('interests', [])) & set(profile2.get('interests', [])))
+    score += min(common_interests * 5, 25)
+
+    # Location compatibility
+    loc1 = profile1.get('location', '').lower()
+    loc2 = profile2.get('location', '').lower()
+    if loc1 == loc2:
+        score += 15
+    elif any(city in loc1 and city in loc2 for city in MAJOR_CITIES[:3]):
+        score += 10
+
+    return max(0, min(100, score))
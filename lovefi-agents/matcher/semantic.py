@@ -0,0 +1,286 @@
+"""
+Optional semantic interest similarity.
+
+Interests are mapped to dense unit vectors, so "bouldering" and
+"climbing" match because they mean the same thing rather than because one
+contains the other. A profile is the normalized mean of its interest
+vectors, and two profiles are as similar as the cosine of theirs, which
+makes a candidate pool one matrix product.
+
+Vectors come from a precomputed table. By default it is built from the
+bundled ``data/interest_concepts.csv``: each term gets the vector of its
+concept, which leans towards the vector of its group, so terms of the same
+concept score 1.0, related concepts about 0.4 and unrelated ones about 0.
+Point ``MATCHER_INTEREST_VECTORS`` at a text file of ``term<TAB>v1 v2 ...``
+lines (or GloVe-style ``word v1 v2 ...``) to use vectors exported from a
+real embedding model instead. Strings missing from the table are embedded
+from their known words plus hashed character trigrams, so two unknown
+strings spelled alike stay close.
+"""
+import csv
+import hashlib
+import math
+import os
+import random
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from .scoring import AGE_STAGE, LOCATION_STAGE, ScoringPipeline, Stage, template
+
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to pure-Python dot products if numpy is not available
+    np = None
+
+CONCEPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'interest_concepts.csv')
+
+# Two different interests at least this similar are reported as a semantic match
+SIMILAR_THRESHOLD = 0.7
+
+# Profiles summed per gather in ``profile_matrix``, bounding its working memory
+_BLOCK_ROWS = 16384
+
+_TOKEN = re.compile(r"[^\W_]+(?:[-'&][^\W_]+)*")
+
+
+def _norm(text: str) -> str:
+    return ' '.join(str(text).lower().split())
+
+
+def _unit(vector: Sequence[float]) -> List[float]:
+    length = math.sqrt(sum(value * value for value in vector))
+    return [value / length for value in vector] if length else [0.0] * len(vector)
+
+
+def _random_unit(name: str, dim: int) -> List[float]:
+    # Seeded from a digest rather than hash(), so vectors are stable across processes
+    seed = int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'little')
+    rng = random.Random(seed)
+    return _unit([rng.gauss(0.0, 1.0) for _ in range(dim)])
+
+
+def _add(total: List[float], vector: Sequence[float], weight: float = 1.0):
+    for i, value in enumerate(vector):
+        total[i] += value * weight
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class InterestEmbedder:
+    """
+    Interest vectors from a precomputed table, cached per distinct string.
+
+    ``vector`` embeds one interest; ``similarity`` compares two interest
+    lists and ``similarity_matrix`` every list on one side with every list
+    on the other. Vectors are NumPy ``float32`` arrays when NumPy is
+    installed and tuples otherwise.
+    """
+
+    def __init__(self, table: Dict[str, Sequence[float]], oov_weight: float = 0.5):
+        dims = {len(vector) for vector in table.values()}
+        if len(dims) != 1:
+            raise ValueError("the vector table must be non-empty with vectors of one length")
+        self.dim = dims.pop()
+        self.oov_weight = oov_weight
+        self._table = {_norm(term): _unit(vector) for term, vector in table.items()}
+        self._zero = self._finish([0.0] * self.dim)
+        self.vector = lru_cache(maxsize=65536)(self._embed)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @classmethod
+    def from_concepts(cls, path: str = CONCEPTS_PATH, dim: int = 64, group_weight: float = 0.8) -> 'InterestEmbedder':
+        """
+        Table from a ``group,concept,terms`` CSV (terms separated by ``|``).
+
+        A concept's vector is a random direction pulled towards its group's
+        by ``group_weight``; a term listed under several concepts gets their
+        normalized sum.
+        """
+        table: Dict[str, List[float]] = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                concept = [0.0] * dim
+                _add(concept, _random_unit('group:' + row['group'], dim), group_weight)
+                _add(concept, _random_unit('concept:' + row['concept'], dim))
+                concept = _unit(concept)
+                for term in row['terms'].split('|'):
+                    if term:
+                        _add(table.setdefault(_norm(term), [0.0] * dim), concept)
+        return cls(table)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'InterestEmbedder':
+        """Table from ``term<TAB>v1 v2 ...`` or ``word v1 v2 ...`` lines (a word2vec header is skipped)"""
+        table: Dict[str, List[float]] = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                term, _, values = line.partition('\t') if '\t' in line else line.partition(' ')
+                vector = [float(value) for value in values.split()]
+                if len(vector) > 1:
+                    table[term] = vector
+        return cls(table)
+
+    @classmethod
+    def from_env(cls) -> 'InterestEmbedder':
+        """The table at MATCHER_INTEREST_VECTORS, or the bundled concepts"""
+        path = os.environ.get('MATCHER_INTEREST_VECTORS')
+        return cls.from_file(path) if path else cls.from_concepts()
+
+    def _finish(self, vector: List[float]):
+        return np.asarray(vector, dtype=np.float32) if np is not None else tuple(vector)
+
+    def _trigrams(self, token: str) -> List[float]:
+        padded = f"<{token}>"
+        vector = [0.0] * self.dim
+        for i in range(len(padded) - 2):
+            _add(vector, _random_unit('trigram:' + padded[i:i + 3], self.dim))
+        return _unit(vector)
+
+    def _embed(self, interest: str):
+        key = _norm(interest)
+        vector = self._table.get(key)
+        if vector is None:
+            vector = [0.0] * self.dim
+            for token in _TOKEN.findall(key):
+                known = self._table.get(token)
+                if known is not None:
+                    _add(vector, known)
+                else:
+                    _add(vector, self._trigrams(token), self.oov_weight)
+        vector = _unit(vector)
+        return self._finish(vector) if any(vector) else self._zero
+
+    def profile_vector(self, interests: List[str]):
+        """Normalized mean of the distinct interests' vectors (all zeros for none)"""
+        return self.profile_matrix([interests])[0]
+
+    def profile_matrix(self, interest_lists: List[List[str]]):
+        """One profile vector per interest list, as rows of a matrix"""
+        if np is None:
+            rows = []
+            for interests in interest_lists:
+                total = [0.0] * self.dim
+                for interest in dict.fromkeys(interests):
+                    _add(total, self.vector(interest))
+                rows.append(tuple(_unit(total)))
+            return rows
+
+        vocabulary: Dict[str, int] = {}
+        columns, counts = [], []
+        for interests in interest_lists:
+            distinct = dict.fromkeys(interests)
+            counts.append(len(distinct))
+            columns.extend(vocabulary.setdefault(interest, len(vocabulary)) for interest in distinct)
+        matrix = np.zeros((len(interest_lists), self.dim), dtype=np.float32)
+        if vocabulary:
+            vectors = np.stack([self.vector(interest) for interest in vocabulary])
+            columns = np.asarray(columns)
+            counts = np.asarray(counts)
+            starts = np.cumsum(counts) - counts
+            # Rows with the same number of interests gather and sum as one
+            # (rows, count, dim) block; far faster than np.add.reduceat
+            for count in np.unique(counts[counts > 0]).tolist():
+                rows = np.flatnonzero(counts == count)
+                for chunk in range(0, len(rows), _BLOCK_ROWS):
+                    block = rows[chunk:chunk + _BLOCK_ROWS]
+                    positions = starts[block][:, None] + np.arange(count)
+                    matrix[block] = vectors[columns[positions]].sum(axis=1)
+        lengths = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, lengths, out=matrix, where=lengths > 0)
+
+    def similarity_matrix(self, interests_a: List[List[str]], interests_b: List[List[str]]):
+        """Cosine similarity, clipped to 0-1, of every list in ``interests_a`` with every list in ``interests_b``"""
+        a = self.profile_matrix(interests_a)
+        b = self.profile_matrix(interests_b)
+        if np is None:
+            return [[max(0.0, min(1.0, _dot(row, column))) for column in b] for row in a]
+        return np.clip(a @ b.T, 0.0, 1.0).astype(np.float64)
+
+    def similarity(self, interests1: List[str], interests2: List[str]) -> float:
+        """Cosine similarity of two interest lists, clipped to 0-1"""
+        return float(self.similarity_matrix([interests1], [interests2])[0][0])
+
+    def compare(self, interests1: List[str], interests2: List[str],
+                threshold: float = SIMILAR_THRESHOLD):
+        """
+        ``similarity`` of two interest lists, plus ``[a, b, similarity]`` for
+        every pair of different interests at least ``threshold`` alike, most
+        similar first. Each side's vectors are looked up once for both.
+        """
+        side1 = list(dict.fromkeys(interests1))
+        side2 = list(dict.fromkeys(interests2))
+        vectors1 = [self.vector(interest) for interest in side1]
+        vectors2 = [self.vector(interest) for interest in side2]
+        if np is not None and side1 and side2:
+            a, b = np.stack(vectors1), np.stack(vectors2)
+            pair_scores = (a @ b.T).tolist()
+            total1, total2 = a.sum(axis=0), b.sum(axis=0)
+            lengths = float(np.linalg.norm(total1) * np.linalg.norm(total2))
+            similarity = float(total1 @ total2) / lengths if lengths else 0.0
+        else:
+            pair_scores = [[_dot(x, y) for y in vectors2] for x in vectors1]
+            total1, total2 = [0.0] * self.dim, [0.0] * self.dim
+            for vector in vectors1:
+                _add(total1, vector)
+            for vector in vectors2:
+                _add(total2, vector)
+            similarity = _dot(_unit(total1), _unit(total2))
+
+        pairs = [
+            [a, b, round(score, 3)]
+            for a, row in zip(side1, pair_scores) for b, score in zip(side2, row)
+            if a != b and score >= threshold
+        ]
+        pairs.sort(key=lambda pair: -pair[2])
+        return max(0.0, min(1.0, similarity)), pairs
+
+
+@lru_cache(maxsize=None)
+def default_embedder() -> InterestEmbedder:
+    """The process-wide embedder, built on first use (see ``InterestEmbedder.from_env``)"""
+    return InterestEmbedder.from_env()
+
+
+def analyze_interests_semantic(interests1: List[str], interests2: List[str],
+                               embedder: Optional[InterestEmbedder] = None) -> Dict:
+    """
+    Interest analysis scored by embedding similarity.
+
+    ``compatibility_score`` is the cosine similarity of the two profiles'
+    interest vectors (0-1); ``semantic_matches`` counts pairs of different
+    interests that mean nearly the same thing.
+    """
+    embedder = embedder or default_embedder()
+    set1 = set(interests1)
+    set2 = set(interests2)
+    shared = sorted(set1 & set2)
+    direct_overlap = len(shared)
+    similarity, pairs = embedder.compare(interests1, interests2)
+    return {
+        'direct_matches': direct_overlap,
+        'semantic_matches': len(pairs),
+        'shared_interests': shared,
+        'similar_interests': pairs[:5],
+        'similarity': similarity,
+        'total_interests': len(set1) + len(set2) - direct_overlap,
+        'compatibility_score': similarity,
+    }
+
+
+SEMANTIC_INTEREST_STAGE = Stage(
+    'interests',
+    lambda p1, p2: analyze_interests_semantic(p1.get('interests', []), p2.get('interests', [])),
+    template("Interests: {direct_matches} direct matches, {semantic_matches} similar interests "
+             "(Score: {score:.0f}/100)"),
+    cost=2,
+)
+
+# score_profiles with embedding similarity in place of keyword categories
+SEMANTIC_PIPELINE = ScoringPipeline((AGE_STAGE, SEMANTIC_INTEREST_STAGE, LOCATION_STAGE))
@@ -0,0 +1,186 @@
+"""
+Pre-forking HTTP server for self-hosted deployments.
+
+The master process loads the application once (FastAPI, NumPy and every
+scoring table), binds the listening socket and then forks the workers, so
+they start with the tables already built and share their memory
+copy-on-write. Each worker runs its own uvicorn event loop on the shared
+socket; the master only supervises:
+
+- a worker that dies is replaced;
+- SIGTERM or SIGINT stops accepting new connections, lets every worker
+  finish its in-flight requests for up to ``graceful_timeout`` seconds and
+  then kills whatever is left.
+
+Forking needs a POSIX system; with one worker the server runs in-process.
+"""
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# A worker that exits this soon after starting is failing to boot, not crashing
+_MIN_UPTIME = 1.0
+
+
+class ServerOptions:
+    """Listening address, worker count and per-worker connection limits"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8000, workers: int = 1,
+                 limit_concurrency: Optional[int] = None, backlog: int = 2048,
+                 keep_alive: float = 5.0, graceful_timeout: float = 30.0, log_level: str = "info"):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.limit_concurrency = limit_concurrency
+        self.backlog = backlog
+        self.keep_alive = keep_alive
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+
+    @classmethod
+    def from_env(cls, prefix: str = "MATCHER_SERVER") -> "ServerOptions":
+        """
+        Build options from ``<prefix>_HOST``, ``_PORT``, ``_WORKERS``,
+        ``_CONCURRENCY``, ``_BACKLOG``, ``_KEEP_ALIVE``, ``_GRACEFUL_TIMEOUT``
+        and ``_LOG_LEVEL``; ``_WORKERS=auto`` means one per CPU
+        """
+        def env(name: str) -> Optional[str]:
+            return os.environ.get(f"{prefix}_{name}") or None
+
+        workers = env("WORKERS")
+        concurrency = env("CONCURRENCY")
+        return cls(
+            host=env("HOST") or "0.0.0.0",
+            port=int(env("PORT") or 8000),
+            workers=(os.cpu_count() or 1) if workers == "auto" else int(workers or 1),
+            limit_concurrency=int(concurrency) if concurrency else None,
+            backlog=int(env("BACKLOG") or 2048),
+            keep_alive=float(env("KEEP_ALIVE") or 5.0),
+            graceful_timeout=float(env("GRACEFUL_TIMEOUT") or 30.0),
+            log_level=env("LOG_LEVEL") or "info",
+        )
+
+
+def bind_socket(options: ServerOptions) -> socket.socket:
+    # An explicit IPPROTO_TCP: asyncio only sets TCP_NODELAY on accepted
+    # connections of sockets that declare it, and Nagle's algorithm would
+    # hold back every response behind the client's delayed ACK
+    family = socket.AF_INET6 if ":" in options.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((options.host, options.port))
+    sock.listen(options.backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, options: ServerOptions):
+    """Serve ``app`` on ``sock`` until SIGTERM/SIGINT, then drain in-flight requests"""
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        limit_concurrency=options.limit_concurrency,
+        backlog=options.backlog,
+        timeout_keep_alive=options.keep_alive,
+        timeout_graceful_shutdown=options.graceful_timeout,
+        log_level=options.log_level,
+        access_log=False,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(load_app: Callable[[], object], options: ServerOptions):
+    """Load the app once, then serve it from ``options.workers`` processes"""
+    app = load_app()
+    sock = bind_socket(options)
+    logger.info("Listening on %s:%d with %d worker(s)", options.host, options.port, options.workers)
+    if options.workers == 1:
+        run_worker(app, sock, options)
+        return
+    try:
+        _Supervisor(app, sock, options).run()
+    finally:
+        sock.close()
+
+
+class _Supervisor:
+    def __init__(self, app, sock: socket.socket, options: ServerOptions):
+        self.app = app
+        self.sock = sock
+        self.options = options
+        self.children: Dict[int, float] = {}
+        self.deadline: Optional[float] = None
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            # The worker installs its own SIGTERM/SIGINT handlers in uvicorn
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            status = 0
+            try:
+                run_worker(self.app, self.sock, self.options)
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                status = 1
+            finally:
+                os._exit(status)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, signum, frame):
+        if self.deadline is None:
+            logger.info("Received %s, draining %d worker(s)", signal.Signals(signum).name, len(self.children))
+            self.deadline = time.monotonic() + self.options.graceful_timeout + 5.0
+        for pid in list(self.children):
+            _signal(pid, signal.SIGTERM)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for _ in range(self.options.workers):
+            self.spawn()
+
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                if self.deadline is not None and time.monotonic() > self.deadline:
+                    logger.warning("Killing %d worker(s) still running after the graceful timeout",
+                                   len(self.children))
+                    for child in list(self.children):
+                        _signal(child, signal.SIGKILL)
+                    self.deadline = float("inf")
+                time.sleep(0.1)
+                continue
+
+            started = self.children.pop(pid, None)
+            if started is None or self.deadline is not None:
+                continue
+            code = _exit_code(status)
+            if time.monotonic() - started < _MIN_UPTIME:
+                logger.error("Worker %d exited with %d during startup; shutting down", pid, code)
+                self.stop(signal.SIGTERM, None)
+                continue
+            logger.warning("Worker %d exited with %d; starting a replacement", pid, code)
+            self.spawn()
+
+
+def _signal(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _exit_code(status: int) -> int:
+    # os.waitstatus_to_exitcode is new in Python 3.9: a negative code is the
+    # signal that killed the worker
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
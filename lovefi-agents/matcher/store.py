@@ -0,0 +1,257 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from .batch import _age_scores, _popcount, age_score, combine_scores
+from .geo import LocationKeys, location_keys, location_score
+from .scoring import TAXONOMY, interest_mask
+from .taxonomy import popcount
+
+try:
+    import numpy as np
+except ImportError:
+    # Fall back to a row-at-a-time loop if numpy is not available
+    np = None
+
+
+class InterestVocabulary:
+    """Interns interest strings to dense integer ids"""
+
+    __slots__ = ('ids', 'names')
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, interest: str) -> int:
+        interest_id = self.ids.get(interest)
+        if interest_id is None:
+            interest_id = self.ids[interest] = len(self.names)
+            self.names.append(interest)
+        return interest_id
+
+    def get(self, interest: str) -> Optional[int]:
+        return self.ids.get(interest)
+
+
+class ProfileRecord:
+    """Read-only view of one stored profile"""
+
+    __slots__ = ('id', 'age', 'location', 'category_mask', 'interest_ids')
+
+    def __init__(self, profile_id: Any, age: float, location: LocationKeys, category_mask: int, interest_ids: array):
+        self.id = profile_id
+        self.age = age
+        self.location = location
+        self.category_mask = category_mask
+        self.interest_ids = interest_ids
+
+
+class ProfileStore:
+    """
+    Columnar, append-only store for a resident candidate pool.
+
+    Each profile costs one slot in a handful of typed arrays: age, an id into
+    a table of distinct locations, its category bitmask and its interests as
+    a sorted run of interned integer ids (CSR layout: ``interest_offsets``
+    indexes into one flat ``interest_ids`` array). No per-profile dict, list
+    or string is kept apart from the caller's id, and direct interest
+    overlap is counted on integers.
+
+    ``add`` on an existing id and ``remove`` leave a dead row behind;
+    ``compact`` reclaims them. Rankings match ``rank_candidates`` over the
+    live profiles in insertion order.
+    """
+
+    def __init__(self):
+        if len(TAXONOMY.categories) > 64:
+            raise ValueError("ProfileStore packs category masks into 64 bits")
+        self.vocabulary = InterestVocabulary()
+        self.locations: List[LocationKeys] = []
+        self.location_names: List[str] = []
+        self._location_ids: Dict[str, int] = {}
+        self._rows: Dict[Any, int] = {}
+        self.ids: List[Any] = []
+        self.ages = array('d')
+        self.location_ids = array('I')
+        self.category_masks = array('Q')
+        self.interest_offsets = array('Q', [0])
+        self.interest_ids = array('I')
+        self._derived = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, profile_id) -> bool:
+        return profile_id in self._rows
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._rows)
+
+    def add(self, profile: Dict) -> int:
+        """Append ``profile`` (which must carry an ``id``), replacing any previous version"""
+        profile_id = profile['id']
+        self.remove(profile_id)
+
+        interests = set(profile.get('interests', []))
+        mask = 0
+        for interest in interests:
+            mask |= interest_mask(interest)
+        ids = sorted(self.vocabulary.intern(interest) for interest in interests)
+
+        location = profile.get('location', '')
+        location_id = self._location_ids.get(location)
+        if location_id is None:
+            location_id = self._location_ids[location] = len(self.locations)
+            self.locations.append(location_keys(location))
+            self.location_names.append(location)
+
+        row = len(self.ids)
+        self.ids.append(profile_id)
+        self.ages.append(profile.get('age', 25))
+        self.location_ids.append(location_id)
+        self.category_masks.append(mask)
+        self.interest_ids.extend(ids)
+        self.interest_offsets.append(len(self.interest_ids))
+        self._rows[profile_id] = row
+        self._derived = None
+        return row
+
+    def remove(self, profile_id) -> bool:
+        """Delete a profile; returns False if it was not stored"""
+        row = self._rows.pop(profile_id, None)
+        if row is None:
+            return False
+        self.ids[row] = None
+        return True
+
+    def compact(self):
+        """Drop dead rows left by ``remove`` and replaced profiles"""
+        if len(self._rows) == len(self.ids):
+            return
+        live = sorted(self._rows.values())
+        ids, ages, location_ids, masks = [], array('d'), array('I'), array('Q')
+        offsets, interest_ids = array('Q', [0]), array('I')
+        for row in live:
+            ids.append(self.ids[row])
+            ages.append(self.ages[row])
+            location_ids.append(self.location_ids[row])
+            masks.append(self.category_masks[row])
+            interest_ids.extend(self.interest_ids[self.interest_offsets[row]:self.interest_offsets[row + 1]])
+            offsets.append(len(interest_ids))
+        self.ids, self.ages, self.location_ids, self.category_masks = ids, ages, location_ids, masks
+        self.interest_offsets, self.interest_ids = offsets, interest_ids
+        self._rows = {profile_id: row for row, profile_id in enumerate(ids)}
+        self._derived = None
+
+    def record(self, profile_id) -> ProfileRecord:
+        row = self._rows[profile_id]
+        return ProfileRecord(
+            profile_id,
+            self.ages[row],
+            self.locations[self.location_ids[row]],
+            self.category_masks[row],
+            self.interest_ids[self.interest_offsets[row]:self.interest_offsets[row + 1]],
+        )
+
+    def profile(self, profile_id) -> Dict:
+        """Rebuild the dict form of a stored profile"""
+        row = self._rows[profile_id]
+        names = self.vocabulary.names
+        return {
+            'id': profile_id,
+            'age': self.ages[row],
+            'interests': [names[i] for i in self.interest_ids[self.interest_offsets[row]:self.interest_offsets[row + 1]]],
+            'location': self.location_names[self.location_ids[row]],
+        }
+
+    def _seeker(self, seeker: Dict):
+        interests = set(seeker.get('interests', []))
+        mask = 0
+        for interest in interests:
+            mask |= interest_mask(interest)
+        # Interests nobody in the pool has cannot produce a direct match
+        ids = {self.vocabulary.get(interest) for interest in interests} - {None}
+        return seeker.get('age', 25), mask, ids, location_keys(seeker.get('location', ''))
+
+    def scores(self, seeker: Dict):
+        """Final score of ``seeker`` against every row, dead rows included"""
+        age, mask, ids, location = self._seeker(seeker)
+        if np is not None:
+            return self._vector_scores(age, mask, ids, location)
+
+        location_table: Dict[int, float] = {}
+        offsets, interest_ids = self.interest_offsets, self.interest_ids
+        scores = []
+        for row in range(len(self.ids)):
+            total = popcount(mask | self.category_masks[row])
+            if total:
+                direct = 0
+                for i in range(offsets[row], offsets[row + 1]):
+                    if interest_ids[i] in ids:
+                        direct += 1
+                interest = (direct * 2 + popcount(mask & self.category_masks[row])) / total
+            else:
+                interest = 0
+            location_id = self.location_ids[row]
+            location_value = location_table.get(location_id)
+            if location_value is None:
+                location_value = location_table[location_id] = location_score(location, self.locations[location_id])
+            score = combine_scores(age_score(abs(age - self.ages[row])), interest, location_value)
+            scores.append(max(0, min(100, score)))
+        return scores
+
+    def _derived_columns(self):
+        """Seeker-independent arrays, built on first use and dropped when the store changes"""
+        if self._derived is None:
+            rows = len(self.ids)
+            ages = np.frombuffer(self.ages, dtype=np.float64, count=rows)
+            masks = np.frombuffer(self.category_masks, dtype=np.uint64, count=rows).astype(np.int64)
+            offsets = np.frombuffer(self.interest_offsets, dtype=np.uint64, count=rows + 1).astype(np.int64)
+            # Ages and category masks take few distinct values: score those and
+            # gather, instead of evaluating every row
+            age_values, age_index = np.unique(ages, return_inverse=True)
+            mask_values, mask_index = np.unique(masks, return_inverse=True)
+            # Row of every entry in interest_ids, for counting hits per row
+            interest_rows = np.repeat(np.arange(rows), np.diff(offsets))
+            self._derived = (age_values, age_index, mask_values, mask_index,
+                             _popcount(mask_values), interest_rows)
+        return self._derived
+
+    def _vector_scores(self, age: float, mask: int, ids: Set[int], location: LocationKeys):
+        rows = len(self.ids)
+        age_values, age_index, mask_values, mask_index, mask_bits, interest_rows = self._derived_columns()
+        # Zero-copy view over the typed array
+        interest_ids = np.frombuffer(self.interest_ids, dtype=np.uint32, count=len(interest_rows))
+
+        # A lookup table over the vocabulary beats a set-membership test per entry
+        seeker_has = np.zeros(len(self.vocabulary), dtype=bool)
+        seeker_has[list(ids)] = True
+        direct = np.bincount(interest_rows, weights=seeker_has[interest_ids], minlength=rows)
+
+        common = _popcount(mask_values & mask)
+        total = (mask_bits + popcount(mask) - common)[mask_index]
+        common = common[mask_index]
+        interest = np.divide(direct * 2 + common, total, out=np.zeros(rows), where=total > 0)
+
+        location_ids = np.frombuffer(self.location_ids, dtype=np.uint32, count=rows)
+        table = np.array([location_score(location, keys) for keys in self.locations], dtype=np.float64)
+        ages = _age_scores(np.abs(age - age_values))[age_index]
+        return np.clip(combine_scores(ages, interest, table[location_ids]), 0, 100)
+
+    def rank(self, seeker: Dict, top_k: Optional[int] = None, exclude_id: Any = None) -> List[Dict[str, Any]]:
+        """Best matches for ``seeker`` among live profiles, as ``{"id", "score"}`` dicts"""
+        if exclude_id is None:
+            exclude_id = seeker.get('id')
+        scores = self.scores(seeker)
+        live = sorted(row for profile_id, row in self._rows.items() if profile_id != exclude_id)
+        if np is not None:
+            live = np.asarray(live, dtype=np.int64)
+            order = live[np.argsort(-scores[live], kind='stable')]
+        else:
+            order = sorted(live, key=lambda row: -scores[row])
+        if top_k is not None:
+            order = order[:top_k]
+        return [{"id": self.ids[row], "score": float(scores[row])} for row in order]
@@ -0,0 +1,80 @@
+from collections import deque
+from typing import Dict, List
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    # int.bit_count is new in Python 3.10
+    def popcount(value: int) -> int:
+        """Number of set bits in a non-negative ``value``"""
+        return bin(value).count('1')
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over an interest taxonomy.
+
+    Categorizes a string in one pass over its characters while keeping the
+    substring semantics of ``keyword in text.lower()``, so "rock climbing"
+    still lands in the category that owns "climbing". Matches are reported as
+    an integer bitmask with bit ``i`` set for ``categories[i]``.
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.categories = list(taxonomy)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[int] = [0]
+
+        for bit, keywords in enumerate(taxonomy.values()):
+            for keyword in keywords:
+                self._insert(keyword.lower(), 1 << bit)
+        self._link()
+
+    def _insert(self, keyword: str, mask: int):
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+            state = nxt
+        self._out[state] |= mask
+
+    def _link(self):
+        # Depth-one states fail back to the root; deeper states follow their
+        # parent's failure chain, inheriting the outputs of their fallback.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def mask(self, text: str) -> int:
+        """Bitmask of every category with a keyword occurring in ``text``"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found |= out[state]
+        return found
+
+    def names(self, mask: int) -> List[str]:
+        """Category names for ``mask`` in taxonomy order"""
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.categories[low.bit_length() - 1])
+            mask ^= low
+        return names
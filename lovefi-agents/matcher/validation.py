@@ -0,0 +1,246 @@
+"""
+Bounded request validation for the scoring routes.
+
+Requests are checked cheapest first, so an oversized or malformed one is
+refused before it can occupy a worker:
+
+1. the declared ``Content-Length``, which must be a number (400), against
+   the route's byte limit, before the body is read, and the body itself as
+   it arrives (413);
+2. the body, which must be well-formed JSON (422);
+3. the payload, parsed and validated in one pass against schemas compiled
+   once per process: profile fields must have the expected types, with at
+   most ``max_interests`` interests, strings of at most
+   ``max_string_length`` characters and at most ``max_candidates``
+   candidates (422);
+4. the work a batch asks for: seekers times candidates must not exceed
+   ``max_pairs`` (413).
+
+Validated payloads keep only the fields the scorer reads, so nothing
+unbounded reaches it. Pydantic is imported when the schemas are first
+compiled, not with this module. Rejections are counted in
+``rejected_total`` by route and reason.
+"""
+import base64
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from .envelope import DecodeError, loads
+from .metrics import METRICS
+
+
+class RequestRejected(Exception):
+    """A request refused before scoring; ``status_code`` is the HTTP status to answer with"""
+    status_code = 422
+    reason = 'invalid'
+
+
+class PayloadTooLarge(RequestRejected):
+    status_code = 413
+    reason = 'too_large'
+
+
+class InvalidPayload(RequestRejected):
+    pass
+
+
+class BadRequest(RequestRejected):
+    status_code = 400
+    reason = 'bad_request'
+
+
+class RequestLimits:
+    """Byte, count and length limits for scoring requests"""
+
+    def __init__(self, max_body_bytes: int = 64 * 1024, max_batch_bytes: int = 32 * 1024 * 1024,
+                 max_interests: int = 64, max_string_length: int = 256, max_candidates: int = 100000,
+                 max_seekers: int = 100, max_pairs: int = 1000000):
+        self.max_body_bytes = max_body_bytes
+        self.max_batch_bytes = max_batch_bytes
+        self.max_interests = max_interests
+        self.max_string_length = max_string_length
+        self.max_candidates = max_candidates
+        self.max_seekers = max_seekers
+        self.max_pairs = max_pairs
+
+    @classmethod
+    def from_env(cls, prefix: str = "MATCHER_MAX") -> "RequestLimits":
+        """
+        Build limits from ``<prefix>_BODY_BYTES``, ``_BATCH_BYTES``,
+        ``_INTERESTS``, ``_STRING_LENGTH``, ``_CANDIDATES``, ``_SEEKERS`` and
+        ``_PAIRS``
+        """
+        defaults = cls()
+        values = {}
+        for name in ('body_bytes', 'batch_bytes', 'interests', 'string_length', 'candidates', 'seekers', 'pairs'):
+            value = os.environ.get(f"{prefix}_{name.upper()}")
+            if value:
+                values[f"max_{name}"] = int(value)
+        return cls(**{**vars(defaults), **values})
+
+
+LIMITS = RequestLimits.from_env()
+
+
+def check_length(content_length: Optional[str], limit: int) -> int:
+    """
+    Refuse a body by its declared ``Content-Length`` before reading it.
+
+    Returns the declared length (0 without the header); a value that is not
+    a plain decimal number is refused as ``BadRequest``.
+    """
+    if content_length is None:
+        return 0
+    text = content_length.strip()
+    if not (text.isascii() and text.isdigit()):
+        raise BadRequest(f"invalid Content-Length: {content_length[:32]!r}")
+    length = int(text)
+    if length > limit:
+        raise PayloadTooLarge(f"body of {length} bytes exceeds the {limit} byte limit")
+    return length
+
+
+def check_size(size: int, limit: int):
+    if size > limit:
+        raise PayloadTooLarge(f"body exceeds the {limit} byte limit")
+
+
+@lru_cache(maxsize=None)
+def _profile():
+    from typing import List, Union
+
+    from pydantic import ConfigDict, Field, StringConstraints, with_config
+    from typing_extensions import Annotated, NotRequired, TypedDict
+
+    Text = Annotated[str, StringConstraints(max_length=LIMITS.max_string_length)]
+    Age = Union[Annotated[int, Field(ge=0, le=200)],
+                Annotated[float, Field(ge=0, le=200, allow_inf_nan=False)]]
+
+    @with_config(ConfigDict(strict=True, extra='ignore'))
+    class Profile(TypedDict):
+        id: NotRequired[Union[Text, int]]
+        age: NotRequired[Age]
+        interests: NotRequired[Annotated[List[Text], Field(max_length=LIMITS.max_interests)]]
+        location: NotRequired[Text]
+
+    return Profile
+
+
+@lru_cache(maxsize=None)
+def schema(kind: str):
+    """
+    Pydantic validator for ``matching`` or ``batch`` payloads.
+
+    Compiled on first use and shared afterwards. The payload field names are
+    those of the uAgent messages in ``matcher.models``. The schemas are
+    TypedDicts rather than models, so they produce the plain dicts the
+    scorer takes without building an object per profile.
+    """
+    from typing import List, Literal
+
+    from pydantic import ConfigDict, Field, TypeAdapter, with_config
+    from typing_extensions import Annotated, NotRequired, TypedDict
+
+    from .scoring import TEXT_FIELDS
+
+    Profile = _profile()
+    config = with_config(ConfigDict(strict=True, extra='ignore'))
+
+    if kind == 'matching':
+        @config
+        class MatchingPayload(TypedDict):
+            profile1: NotRequired[Profile]
+            profile2: NotRequired[Profile]
+            min_score: NotRequired[Optional[float]]
+            score_only: NotRequired[bool]
+            include: NotRequired[List[Literal[TEXT_FIELDS]]]
+            semantic: NotRequired[bool]
+
+        return TypeAdapter(MatchingPayload)
+
+    if kind == 'batch':
+        @config
+        class BatchPayload(TypedDict):
+            seeker: NotRequired[Profile]
+            seekers: NotRequired[Annotated[List[Profile], Field(max_length=LIMITS.max_seekers)]]
+            candidates: NotRequired[Annotated[List[Profile], Field(max_length=LIMITS.max_candidates)]]
+            top_k: NotRequired[Optional[Annotated[int, Field(ge=0)]]]
+            max_distance_km: NotRequired[Optional[Annotated[float, Field(ge=0)]]]
+            chunk_size: NotRequired[Annotated[int, Field(ge=1, le=LIMITS.max_candidates)]]
+            min_score: NotRequired[Optional[float]]
+            semantic: NotRequired[bool]
+
+        return TypeAdapter(BatchPayload)
+
+    raise ValueError(f"unknown payload kind: {kind}")
+
+
+def pair_count(payload: Dict) -> int:
+    """Seeker/candidate pairs a validated batch payload asks to score"""
+    seekers = 1 if 'seeker' in payload else len(payload.get('seekers', ()))
+    return seekers * len(payload.get('candidates', ()))
+
+
+def check_pairs(payload: Dict, limit: int):
+    """Refuse a batch payload scoring more than ``limit`` seeker/candidate pairs"""
+    pairs = pair_count(payload)
+    if pairs > limit:
+        raise PayloadTooLarge(f"{pairs} seeker/candidate pairs exceed the {limit} pair limit")
+
+
+def _invalid(error) -> InvalidPayload:
+    # Each member of a union (an age is an int or a float) reports under its
+    # own tag such as "constrained-int": drop the tags and keep the last
+    # message per field. Input values are left out: they may be huge.
+    problems: Dict[str, str] = {}
+    for problem in error.errors(include_input=False, include_url=False):
+        loc = '.'.join(str(part) for part in problem['loc'] if not (isinstance(part, str) and '-' in part))
+        problems[loc or 'payload'] = problem['msg']
+    shown = [f"{loc}: {message}" for loc, message in list(problems.items())[:3]]
+    more = len(problems) - len(shown)
+    return InvalidPayload("; ".join(shown) + (f" (and {more} more)" if more > 0 else ""))
+
+
+def load_body(raw: bytes) -> Any:
+    """Parse a JSON request body, refusing malformed JSON as ``InvalidPayload``"""
+    try:
+        return loads(raw)
+    except DecodeError as e:
+        raise InvalidPayload(f"body is not valid JSON: {e}") from None
+
+
+def validate(kind: str, data: Any) -> Dict:
+    """Validate an already decoded ``matching`` or ``batch`` payload"""
+    from pydantic import ValidationError
+
+    try:
+        payload = schema(kind).validate_python(data)
+    except ValidationError as e:
+        raise _invalid(e) from None
+    if kind == 'batch':
+        check_pairs(payload, LIMITS.max_pairs)
+    return payload
+
+
+def validate_encoded(kind: str, payload: str) -> Dict:
+    """Decode and validate the base64 ``payload`` of an envelope in one pass"""
+    from pydantic import ValidationError
+
+    try:
+        raw = base64.b64decode(payload)
+    except ValueError as e:
+        # binascii.Error for bad padding or characters, a plain ValueError
+        # for a str with non-ASCII characters
+        raise InvalidPayload(f"payload is not base64: {e}") from None
+    try:
+        data = schema(kind).validate_json(raw)
+    except ValidationError as e:
+        raise _invalid(e) from None
+    if kind == 'batch':
+        check_pairs(data, LIMITS.max_pairs)
+    return data
+
+
+def record_rejection(route: str, error: RequestRejected):
+    METRICS.inc('rejected_total', route=route, reason=error.reason)
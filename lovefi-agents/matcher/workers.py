@@ -0,0 +1,79 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class PoolBusy(Exception):
+    """Raised when the scoring pool's queue is full"""
+
+
+class ScoringPool:
+    """
+    Bounded executor for CPU-heavy scoring called from asyncio code.
+
+    Work runs on a thread or process pool so the event loop keeps accepting
+    messages. At most ``max_pending`` jobs may be queued or running; beyond
+    that ``submit`` fails fast with ``PoolBusy`` instead of letting a burst
+    of requests pile up behind the workers.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None, kind: str = "thread"):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending if max_pending is not None else self.max_workers * 4
+        self.kind = kind
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls, prefix: str = "MATCHER", kind: Optional[str] = None) -> "ScoringPool":
+        """
+        Build a pool from ``<prefix>_WORKERS``, ``<prefix>_QUEUE_DEPTH`` and
+        ``<prefix>_POOL``; a ``kind`` argument overrides ``<prefix>_POOL``
+        """
+        workers = os.environ.get(f"{prefix}_WORKERS")
+        depth = os.environ.get(f"{prefix}_QUEUE_DEPTH")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            max_pending=int(depth) if depth else None,
+            kind=kind or os.environ.get(f"{prefix}_POOL", "thread"),
+        )
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Forked children inherit the tables the parent already built
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("fork" if "fork" in methods else None)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                     initializer=_ignore_interrupts)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scoring")
+        return self._executor
+
+    async def submit(self, fn: Callable[..., Any], *args) -> Any:
+        """Run ``fn(*args)`` on the pool, or raise ``PoolBusy`` if the queue is full"""
+        # Only the event loop thread touches the counters, so no lock is needed
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolBusy(f"{self.pending} scoring jobs already pending")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def _ignore_interrupts():
+    # Ctrl-C reaches the whole process group; the owner of the pool decides
+    # when its workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)